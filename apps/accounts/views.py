@@ -5,6 +5,7 @@ from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.db.models import Count, Q
 
 from .forms import UserRegistrationForm, UserLoginForm
 
@@ -30,17 +31,19 @@ def register_view(request):
 @login_required
 def profile_view(request):
     """User profile view."""
-    # Calculate stats
-    total_qr_codes = request.user.qr_codes.count()
-    dynamic_count = request.user.qr_codes.filter(qr_type='dynamic').count()
-    static_count = request.user.qr_codes.filter(qr_type='static').count()
-    active_count = request.user.qr_codes.filter(status='active').count()
+    # Calculate stats in a single query
+    stats = request.user.qr_codes.aggregate(
+        total=Count('id'),
+        dynamic=Count('id', filter=Q(qr_type='dynamic')),
+        static=Count('id', filter=Q(qr_type='static')),
+        active=Count('id', filter=Q(status='active')),
+    )
 
     context = {
-        'total_qr_codes': total_qr_codes,
-        'dynamic_count': dynamic_count,
-        'static_count': static_count,
-        'active_count': active_count,
+        'total_qr_codes': stats['total'],
+        'dynamic_count': stats['dynamic'],
+        'static_count': stats['static'],
+        'active_count': stats['active'],
     }
 
     return render(request, 'accounts/profile.html', context)
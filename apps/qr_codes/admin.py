@@ -3,7 +3,6 @@ Admin interface for QR Code management.
 """
 from django.contrib import admin
 from django.utils.html import format_html
-from django.urls import reverse
 from django.utils import timezone
 from .models import QRCode, QRScan
 
@@ -65,10 +64,14 @@ class QRCodeAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """Join the owning user so the changelist doesn't query per row."""
+        return super().get_queryset(request).select_related('user')
+
     def short_code_link(self, obj):
         """Display clickable short code link."""
-        if obj.qr_type == 'dynamic' and obj.short_code:
-            url = reverse('qr_codes:redirect', kwargs={'short_code': obj.short_code})
+        url = obj.get_short_url()
+        if url:
             return format_html('<a href="{}" target="_blank">{}</a>', url, obj.short_code)
         return '-'
     short_code_link.short_description = 'Short URL'
@@ -106,6 +109,10 @@ class QRScanAdmin(admin.ModelAdmin):
         'scanned_at',
     ]
 
+    def get_queryset(self, request):
+        """Join the QR code so the changelist doesn't query per row."""
+        return super().get_queryset(request).select_related('qr_code')
+
     def has_add_permission(self, request):
         """Scans are created automatically, not manually."""
         return False
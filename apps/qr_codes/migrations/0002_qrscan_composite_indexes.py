@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-15 22:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_codes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='qrscan',
+            name='qr_scans_visitor_61782d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='qrscan',
+            name='qr_scans_ip_addr_72ed15_idx',
+        ),
+        migrations.AddIndex(
+            model_name='qrscan',
+            index=models.Index(fields=['qr_code', 'is_unique_visitor'], name='qr_scans_qr_code_dfb305_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-15 22:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_codes', '0002_qrscan_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='qrscan',
+            name='scanned_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='scanned at'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.14 on 2026-10-15 22:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def backfill_visitors(apps, schema_editor):
+    """Seed QRVisitor with each visitor's first scan of each QR code."""
+    QRScan = apps.get_model('qr_codes', 'QRScan')
+    QRVisitor = apps.get_model('qr_codes', 'QRVisitor')
+
+    first_scans = (
+        QRScan.objects.exclude(visitor_id='')
+        .values('qr_code_id', 'visitor_id')
+        .annotate(first_seen_at=Min('scanned_at'))
+        .order_by()
+    )
+    QRVisitor.objects.bulk_create(
+        (QRVisitor(**row) for row in first_scans.iterator()),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qr_codes', '0003_qrscan_scanned_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QRVisitor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('visitor_id', models.CharField(help_text='Unique visitor identifier', max_length=64, verbose_name='visitor ID')),
+                ('first_seen_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='first seen at')),
+            ],
+            options={
+                'verbose_name': 'QR visitor',
+                'verbose_name_plural': 'QR visitors',
+                'db_table': 'qr_visitors',
+            },
+        ),
+        migrations.AddField(
+            model_name='qrvisitor',
+            name='qr_code',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visitors', to='qr_codes.qrcode', verbose_name='QR code'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='qrvisitor',
+            unique_together={('qr_code', 'visitor_id')},
+        ),
+        migrations.RunPython(backfill_visitors, migrations.RunPython.noop),
+    ]
@@ -2,10 +2,14 @@
 QR Code models for qrgenerator.
 Supports both static and dynamic QR codes with analytics.
 """
+import logging
 import secrets
 import string
-from django.db import models
+from functools import lru_cache
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 import structlog
@@ -13,12 +17,69 @@ import structlog
 logger = structlog.get_logger(__name__)
 
 
+# Attempts at inserting a freshly generated short code before giving up.
+SHORT_CODE_MAX_ATTEMPTS = 5
+
+# How long a generated short code stays reserved in the cache.
+SHORT_CODE_RESERVATION_TIMEOUT = 60 * 60  # 1 hour
+
+# Columns the redirect view needs for can_scan(), the password check and the
+# redirect itself; skips the TEXT description/tags columns.
+REDIRECT_FIELDS = (
+    'status',
+    'destination_url',
+    'expires_at',
+    'max_scans',
+    'total_scans',
+    'password',
+    'qr_type',
+    'short_code',
+)
+
+# How long redirect lookups are served from the cache. Unknown short codes
+# are cached for less time under a sentinel so they can't flood the database.
+REDIRECT_CACHE_TIMEOUT = 60 * 5  # 5 minutes
+REDIRECT_CACHE_MISS_TIMEOUT = 30
+REDIRECT_CACHE_MISS = 'missing'
+
+
+@lru_cache(maxsize=1)
+def _redirect_url_template():
+    """Resolve the redirect URL pattern once; short codes are spliced in."""
+    return reverse('qr_codes:redirect', kwargs={'short_code': '__SC__'})
+
+
+def _redirect_cache_key(short_code):
+    """Cache key for the redirect lookup of a short code."""
+    return f'qr:r:{short_code}'
+
+
 def generate_short_code(length=8):
     """Generate a random short code for dynamic QR codes."""
     alphabet = string.ascii_letters + string.digits
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
 
+def reserve_short_code(length=8):
+    """
+    Generate a short code not recently handed out by this or another process.
+
+    Codes are reserved with an atomic cache add (SET NX on Redis), which
+    weeds out most collisions without touching the database. The unique
+    constraint on QRCode.short_code remains the final authority, and is all
+    that's left if SHORT_CODE_MAX_ATTEMPTS codes in a row are taken.
+    """
+    for _attempt in range(SHORT_CODE_MAX_ATTEMPTS):
+        code = generate_short_code(length)
+        # Only False means taken; None is a cache outage swallowed by
+        # django-redis, in which case the unique constraint has to do
+        if cache.add(f'qr:sc:{code}', 1, SHORT_CODE_RESERVATION_TIMEOUT) is not False:
+            return code
+
+    # Leave the code unreserved; save() retries if the insert collides
+    return generate_short_code(length)
+
+
 class QRCode(models.Model):
     """
     Base QR Code model supporting both static and dynamic types.
@@ -172,40 +233,113 @@ class QRCode(models.Model):
     def save(self, *args, **kwargs):
         """Generate short code for dynamic QR codes."""
         if self.qr_type == 'dynamic' and not self.short_code:
-            # Generate unique short code
-            while True:
-                code = generate_short_code()
-                if not QRCode.objects.filter(short_code=code).exists():
-                    self.short_code = code
+            # Rely on the unique constraint instead of checking first; with a
+            # 62^8 keyspace a collision is rare enough that a retry is cheaper
+            # than a SELECT on every insert, and it closes the race window.
+            for attempt in range(1, SHORT_CODE_MAX_ATTEMPTS + 1):
+                self.short_code = reserve_short_code()
+                try:
+                    with transaction.atomic():
+                        super().save(*args, **kwargs)
                     break
-
-        super().save(*args, **kwargs)
-
-        logger.info(
-            "qr_code_saved",
-            qr_code_id=self.id,
-            qr_type=self.qr_type,
-            user_id=self.user_id,
-            short_code=self.short_code
-        )
+                except IntegrityError:
+                    if attempt == SHORT_CODE_MAX_ATTEMPTS:
+                        self.short_code = ''
+                        raise
+        else:
+            super().save(*args, **kwargs)
+
+        self.invalidate_redirect_cache()
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "qr_code_saved",
+                qr_code_id=self.id,
+                qr_type=self.qr_type,
+                user_id=self.user_id,
+                short_code=self.short_code
+            )
+
+    def delete(self, *args, **kwargs):
+        """Delete the QR code and drop its cached redirect lookup."""
+        result = super().delete(*args, **kwargs)
+        self.invalidate_redirect_cache()
+        return result
+
+    def invalidate_redirect_cache(self):
+        """Drop the cached redirect lookup so edits take effect immediately."""
+        if self.short_code:
+            cache.delete(_redirect_cache_key(self.short_code))
+
+    @classmethod
+    def get_for_redirect(cls, short_code):
+        """
+        Fetch the QR code behind a short URL, serving hot codes from the cache.
+
+        Codes with a scan limit are read from the database, since can_scan()
+        needs their live total_scans, until the limit is reached; from then
+        on only an edit (which invalidates the cache) can unblock them. For
+        the same reason the redirect view records their scans synchronously
+        rather than buffering them.
+
+        Raises:
+            QRCode.DoesNotExist: if no QR code has this short code
+        """
+        key = _redirect_cache_key(short_code)
+        qr_code = cache.get(key)
+
+        if qr_code == REDIRECT_CACHE_MISS:
+            raise cls.DoesNotExist(f"No QR code with short code {short_code!r}")
+
+        if qr_code is None:
+            try:
+                qr_code = cls.objects.only(*REDIRECT_FIELDS).get(short_code=short_code)
+            except cls.DoesNotExist:
+                cache.set(key, REDIRECT_CACHE_MISS, REDIRECT_CACHE_MISS_TIMEOUT)
+                raise
+            if qr_code.max_scans is None or qr_code.total_scans >= qr_code.max_scans:
+                cache.set(key, qr_code, REDIRECT_CACHE_TIMEOUT)
+
+        return qr_code
+
+    @classmethod
+    def allocate_short_codes(cls, count, slack=8):
+        """
+        Allocate `count` unused short codes with one query per round.
+
+        Intended for bulk creation, where checking candidates one at a time
+        would cost a round-trip per code. The unique constraint remains the
+        final authority, so the codes are not reserved.
+        """
+        allocated = set()
+        while len(allocated) < count:
+            needed = count - len(allocated)
+            candidates = {generate_short_code() for _ in range(needed + slack)}
+            candidates -= allocated
+            existing = set(
+                cls.objects.filter(short_code__in=candidates)
+                .values_list('short_code', flat=True)
+            )
+            allocated.update(list(candidates - existing)[:needed])
+        return list(allocated)
 
     def get_short_url(self):
         """Get the short URL for this QR code (dynamic only)."""
         if self.qr_type == 'dynamic' and self.short_code:
-            return reverse('qr_codes:redirect', kwargs={'short_code': self.short_code})
+            return _redirect_url_template().replace('__SC__', self.short_code)
         return None
 
     def get_full_short_url(self, request=None):
         """Get the full short URL including domain."""
         short_url = self.get_short_url()
+        if short_url and settings.SITE_URL:
+            return settings.SITE_URL + short_url
         if short_url and request:
             return request.build_absolute_uri(short_url)
         return short_url
 
     def can_scan(self):
         """Check if QR code can be scanned."""
-        from django.utils import timezone
-
         if self.status != 'active':
             return False, "QR code is not active"
 
@@ -217,14 +351,32 @@ class QRCode(models.Model):
 
         return True, None
 
+    @classmethod
+    def increment_scan_counts(cls, pk, total=1, unique=0):
+        """
+        Add `total` scans, `unique` of them unique, to the given QR code.
+
+        Issues a single atomic UPDATE with F() expressions so concurrent
+        scans can't lose increments. Returns the recorded scan time.
+        """
+        now = timezone.now()
+        updates = {
+            'total_scans': models.F('total_scans') + total,
+            'last_scanned_at': now,
+        }
+        if unique:
+            updates['unique_scans'] = models.F('unique_scans') + unique
+        cls.objects.filter(pk=pk).update(**updates)
+        return now
+
     def increment_scan_count(self, is_unique=False):
-        """Increment scan counters."""
+        """Increment scan counters and mirror the change in memory."""
+        now = QRCode.increment_scan_counts(self.pk, unique=int(is_unique))
+
         self.total_scans += 1
         if is_unique:
             self.unique_scans += 1
-        from django.utils import timezone
-        self.last_scanned_at = timezone.now()
-        self.save(update_fields=['total_scans', 'unique_scans', 'last_scanned_at'])
+        self.last_scanned_at = now
 
 
 class QRScan(models.Model):
@@ -308,7 +460,9 @@ class QRScan(models.Model):
     )
 
     # Timestamp
-    scanned_at = models.DateTimeField(_('scanned at'), auto_now_add=True)
+    # Set by the scan recorder rather than auto_now_add so buffered scans
+    # keep the time of the request, not the time they were written
+    scanned_at = models.DateTimeField(_('scanned at'), default=timezone.now)
 
     class Meta:
         verbose_name = _('QR scan')
@@ -317,21 +471,37 @@ class QRScan(models.Model):
         ordering = ['-scanned_at']
         indexes = [
             models.Index(fields=['qr_code', '-scanned_at']),
-            models.Index(fields=['visitor_id']),
-            models.Index(fields=['ip_address']),
+            models.Index(fields=['qr_code', 'is_unique_visitor']),
         ]
 
     def __str__(self):
         return f"Scan of {self.qr_code.name} at {self.scanned_at}"
 
-    def save(self, *args, **kwargs):
-        """Track scan and update QR code statistics."""
-        super().save(*args, **kwargs)
-
-        logger.info(
-            "qr_scan_recorded",
-            qr_code_id=self.qr_code_id,
-            device_type=self.device_type,
-            browser=self.browser,
-            was_successful=self.was_successful
-        )
+
+class QRVisitor(models.Model):
+    """
+    First scan of a QR code by each visitor.
+    The unique constraint decides whether a scan is a unique visit, so the
+    scan history never has to be searched.
+    """
+    qr_code = models.ForeignKey(
+        QRCode,
+        on_delete=models.CASCADE,
+        related_name='visitors',
+        verbose_name=_('QR code')
+    )
+    visitor_id = models.CharField(
+        _('visitor ID'),
+        max_length=64,
+        help_text=_('Unique visitor identifier')
+    )
+    first_seen_at = models.DateTimeField(_('first seen at'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('QR visitor')
+        verbose_name_plural = _('QR visitors')
+        db_table = 'qr_visitors'
+        unique_together = [('qr_code', 'visitor_id')]
+
+    def __str__(self):
+        return f"Visitor {self.visitor_id} of {self.qr_code_id}"
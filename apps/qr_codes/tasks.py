@@ -0,0 +1,306 @@
+"""
+Background tasks for QR code scan recording.
+
+When USE_CELERY is enabled the redirect view hands scans off so the database
+writes happen off the request path. With SCAN_BUFFER_ENABLED the scans are
+pushed onto a Redis list and written in batches by a periodic task; otherwise
+each scan is its own Celery job. Without Celery the scan is recorded inline,
+so behaviour is identical in development.
+"""
+import ipaddress
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import structlog
+
+from .models import QRCode, QRScan, QRVisitor
+from .utils import parse_user_agent
+
+try:
+    from celery import shared_task
+except ImportError:  # Celery is only installed when USE_CELERY is enabled
+    shared_task = None
+
+logger = structlog.get_logger(__name__)
+
+# Redis list holding scans waiting to be written, and how many to write at once
+SCAN_BUFFER_KEY = 'qr_codes:scan_buffer'
+SCAN_BUFFER_BATCH_SIZE = 500
+
+# Buffered scans that can't be written because of their own data are moved
+# here for inspection instead of blocking the rest of their batch
+SCAN_BUFFER_DEAD_KEY = 'qr_codes:scan_buffer:dead'
+BAD_SCAN_ERRORS = (DataError, IntegrityError, KeyError, TypeError, ValueError)
+
+# Request-supplied QRScan values are truncated to their column lengths
+SCAN_FIELD_MAX_LENGTHS = {
+    name: QRScan._meta.get_field(name).max_length
+    for name in ('referer', 'device_type', 'browser', 'operating_system')
+}
+
+_buffer_client = None
+
+
+def _get_buffer_client():
+    """Return a Redis client for the scan buffer (the Celery broker)."""
+    global _buffer_client
+    if _buffer_client is None:
+        import redis
+        _buffer_client = redis.Redis.from_url(settings.CELERY_BROKER_URL)
+    return _buffer_client
+
+
+def _clean_ip_address(value):
+    """Return value as a normalized IP address, or None if it isn't one."""
+    # X-Forwarded-For is client-controlled and passed through as-is, and an
+    # invalid value would make the INSERT fail on Postgres' inet column
+    if not isinstance(value, str):
+        return None
+    try:
+        return str(ipaddress.ip_address(value.strip()))
+    except ValueError:
+        return None
+
+
+def _scan_columns(fields):
+    """
+    Turn queued scan fields into QRScan column values.
+
+    Parses the user agent, normalizes the IP address and truncates
+    request-supplied values to their column lengths. Modifies and returns
+    fields.
+    """
+    ua_info = parse_user_agent(fields.get('user_agent', ''))
+    fields['ip_address'] = _clean_ip_address(fields.get('ip_address'))
+    fields.update(
+        device_type=ua_info['device_type'],
+        browser=ua_info['browser'],
+        operating_system=ua_info['operating_system'],
+    )
+    for name, max_length in SCAN_FIELD_MAX_LENGTHS.items():
+        if fields.get(name):
+            fields[name] = fields[name][:max_length]
+    return fields
+
+
+def record_scans(entries):
+    """
+    Record a batch of scans with a single bulk INSERT.
+
+    Args:
+        entries: List of dicts holding `qr_code_id`, an ISO 8601
+            `scanned_at` and JSON-serializable QRScan field values
+            (ip_address, user_agent, referer, visitor_id). Device, browser
+            and OS are parsed from the user agent here, off the request path.
+
+    Returns:
+        Number of scans written
+    """
+    qr_code_ids = {entry['qr_code_id'] for entry in entries}
+    visitor_ids = {entry.get('visitor_id', '') for entry in entries}
+
+    with transaction.atomic():
+        # Scans for QR codes deleted since they were queued are dropped
+        live_ids = set(
+            QRCode.objects.filter(pk__in=qr_code_ids)
+            .order_by().values_list('pk', flat=True)
+        )
+        seen_visitors = set(
+            QRVisitor.objects.filter(
+                qr_code_id__in=live_ids,
+                visitor_id__in=visitor_ids
+            ).order_by().values_list('qr_code_id', 'visitor_id')
+        )
+
+        scans = []
+        totals = Counter()
+        uniques = Counter()
+        for entry in entries:
+            fields = dict(entry)
+            qr_code_id = fields.pop('qr_code_id')
+            if qr_code_id not in live_ids:
+                continue
+
+            scanned_at = fields.pop('scanned_at', None)
+            scanned_at = parse_datetime(scanned_at) if scanned_at else timezone.now()
+
+            visitor = (qr_code_id, fields.get('visitor_id', ''))
+            if visitor in seen_visitors:
+                is_unique_visitor = False
+            else:
+                # Insert straight away rather than get_or_create, as the query
+                # above already missed; the unique constraint settles races
+                # with concurrent writers
+                try:
+                    with transaction.atomic():
+                        QRVisitor.objects.create(
+                            qr_code_id=qr_code_id,
+                            visitor_id=visitor[1],
+                            first_seen_at=scanned_at
+                        )
+                    is_unique_visitor = True
+                except IntegrityError:
+                    is_unique_visitor = False
+                seen_visitors.add(visitor)
+
+            scans.append(QRScan(
+                qr_code_id=qr_code_id,
+                is_unique_visitor=is_unique_visitor,
+                was_successful=True,
+                scanned_at=scanned_at,
+                **_scan_columns(fields)
+            ))
+            totals[qr_code_id] += 1
+            uniques[qr_code_id] += is_unique_visitor
+
+        QRScan.objects.bulk_create(scans, batch_size=SCAN_BUFFER_BATCH_SIZE)
+
+        for qr_code_id, total in totals.items():
+            QRCode.increment_scan_counts(
+                qr_code_id, total=total, unique=uniques[qr_code_id]
+            )
+
+    return len(scans)
+
+
+def record_scan(qr_code_id, scan_fields):
+    """
+    Record a single scan of a QR code the caller has just loaded.
+
+    The inline counterpart of record_scans: it runs without an enclosing
+    transaction and doesn't check that the QR code still exists, so a repeat
+    visitor costs one SELECT, the scan INSERT and the counter UPDATE.
+    """
+    fields = dict(scan_fields)
+    scanned_at = fields.pop('scanned_at', None)
+    scanned_at = parse_datetime(scanned_at) if scanned_at else timezone.now()
+    visitor_id = fields.get('visitor_id', '')
+
+    is_unique_visitor = False
+    if not QRVisitor.objects.filter(qr_code_id=qr_code_id, visitor_id=visitor_id).exists():
+        # The unique constraint settles races with concurrent scans by the
+        # same visitor
+        try:
+            with transaction.atomic():
+                QRVisitor.objects.create(
+                    qr_code_id=qr_code_id,
+                    visitor_id=visitor_id,
+                    first_seen_at=scanned_at
+                )
+            is_unique_visitor = True
+        except IntegrityError:
+            pass
+
+    QRScan.objects.create(
+        qr_code_id=qr_code_id,
+        is_unique_visitor=is_unique_visitor,
+        was_successful=True,
+        scanned_at=scanned_at,
+        **_scan_columns(fields)
+    )
+    QRCode.increment_scan_counts(qr_code_id, unique=int(is_unique_visitor))
+
+
+def record_queued_scan(qr_code_id, scan_fields):
+    """Record a scan handed to Celery; the QR code may be gone by the time it runs."""
+    record_scans([{'qr_code_id': qr_code_id, **scan_fields}])
+
+
+def _record_individually(client, raw_entries):
+    """
+    Write a failed batch one scan at a time so a bad entry can't block the rest.
+
+    Entries that fail on their own data are moved to the dead-letter list.
+    Any other error (e.g. the database going away) puts the unwritten
+    entries back on the buffer and is re-raised.
+
+    Returns:
+        Number of scans written
+    """
+    written = 0
+    for index, raw in enumerate(raw_entries):
+        try:
+            written += record_scans([json.loads(raw)])
+        except BAD_SCAN_ERRORS:
+            logger.error("scan_dead_lettered", exc_info=True)
+            client.rpush(SCAN_BUFFER_DEAD_KEY, raw)
+        except Exception:
+            client.rpush(SCAN_BUFFER_KEY, *raw_entries[index:])
+            raise
+    return written
+
+
+def flush_scan_buffer(batch_size=SCAN_BUFFER_BATCH_SIZE):
+    """
+    Write all buffered scans to the database in batches.
+
+    Returns:
+        Number of scans written
+    """
+    client = _get_buffer_client()
+    written = 0
+
+    while True:
+        # Pop a batch atomically so concurrent flushes never double-write
+        pipe = client.pipeline()
+        pipe.lrange(SCAN_BUFFER_KEY, 0, batch_size - 1)
+        pipe.ltrim(SCAN_BUFFER_KEY, batch_size, -1)
+        raw_entries, _ = pipe.execute()
+        if not raw_entries:
+            break
+
+        try:
+            written += record_scans([json.loads(raw) for raw in raw_entries])
+        except Exception:
+            logger.warning("scan_batch_failed", scans=len(raw_entries), exc_info=True)
+            written += _record_individually(client, raw_entries)
+
+        if len(raw_entries) < batch_size:
+            break
+
+    if written:
+        logger.info("scan_buffer_flushed", scans=written)
+
+    return written
+
+
+if shared_task is not None:
+    record_scan_task = shared_task(name='qr_codes.record_scan', ignore_result=True)(record_queued_scan)
+    flush_scan_buffer_task = shared_task(name='qr_codes.flush_scan_buffer', ignore_result=True)(flush_scan_buffer)
+else:
+    record_scan_task = None
+    flush_scan_buffer_task = None
+
+
+def enqueue_scan(qr_code_id, scan_fields, wait=False):
+    """
+    Hand a scan off for recording, or record it inline without Celery.
+
+    Falls back to recording inline if Redis or the broker is unreachable so
+    a queue outage never loses scans or breaks redirects.
+
+    Args:
+        wait: Record the scan before returning, bypassing Celery and the
+            buffer. Needed when the next redirect must see this scan in
+            total_scans, i.e. for QR codes with max_scans.
+    """
+    if not wait and record_scan_task is not None and getattr(settings, 'USE_CELERY', False):
+        try:
+            if getattr(settings, 'SCAN_BUFFER_ENABLED', False):
+                _get_buffer_client().rpush(
+                    SCAN_BUFFER_KEY,
+                    json.dumps({'qr_code_id': qr_code_id, **scan_fields})
+                )
+            else:
+                # Fail fast instead of letting Celery retry the publish while
+                # the redirect waits; the scan is then recorded inline
+                record_scan_task.apply_async((qr_code_id, scan_fields), retry=False)
+            return
+        except Exception:
+            logger.warning("scan_enqueue_failed", qr_code_id=qr_code_id, exc_info=True)
+
+    record_scan(qr_code_id, scan_fields)
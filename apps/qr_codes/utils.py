@@ -1,16 +1,76 @@
 """
 Utility functions for QR code generation and analytics.
 """
+import hashlib
+import hmac
 import io
+import re
+from functools import lru_cache
 import qrcode
 from qrcode.image.styledpil import StyledPilImage
 from qrcode.image.styles.moduledrawers import RoundedModuleDrawer
 from PIL import Image
+from django.core.cache import cache
 import structlog
 from user_agents import parse
+import xxhash
 
 logger = structlog.get_logger(__name__)
 
+# Map error correction letters to qrcode constants
+ERROR_CORRECTION_MAP = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H,
+}
+
+# Rendered images are a pure function of their inputs, so keep them a while.
+QR_IMAGE_CACHE_TIMEOUT = 60 * 60 * 24 * 30  # 30 days
+
+
+def _qr_image_cache_key(*parts):
+    """Build a content-addressed cache key for a rendered QR image."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'qr:img:{digest}'
+
+
+def _fit_box_size(qr, size):
+    """
+    Size modules so the rendered image is already close to `size` pixels.
+
+    Must be called after qr.make(fit=True) so the module count is known.
+    """
+    modules = qr.modules_count + 2 * qr.border
+    qr.box_size = max(1, size // modules)
+
+
+def _resize_to(img, size):
+    """Snap the image to exactly `size` pixels if it isn't already."""
+    if img.size != (size, size):
+        # QR codes are binary, so NEAREST keeps module edges crisp
+        img = img.resize((size, size), Image.NEAREST)
+    return img
+
+
+def _encode_image(img, format):
+    """
+    Encode the image into a BytesIO buffer.
+
+    Images are encoded on the fly for HTTP delivery, so favour encode speed:
+    binary QR images compress well even at the lowest zlib level.
+    """
+    save_kwargs = {}
+    if format.upper() == 'PNG':
+        save_kwargs = {'optimize': False, 'compress_level': 1}
+    elif format.upper() in ('JPEG', 'JPG'):
+        save_kwargs = {'optimize': False, 'quality': 85}
+
+    buffer = io.BytesIO()
+    img.save(buffer, format=format, **save_kwargs)
+    buffer.seek(0)
+    return buffer
+
 
 def generate_qr_code(
     data,
@@ -34,24 +94,24 @@ def generate_qr_code(
     Returns:
         BytesIO object containing the QR code image
     """
-    # Map error correction letters to qrcode constants
-    error_correction_map = {
-        'L': qrcode.constants.ERROR_CORRECT_L,
-        'M': qrcode.constants.ERROR_CORRECT_M,
-        'Q': qrcode.constants.ERROR_CORRECT_Q,
-        'H': qrcode.constants.ERROR_CORRECT_H,
-    }
+    cache_key = _qr_image_cache_key(
+        data, size, error_correction, foreground_color, background_color, format
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return io.BytesIO(cached)
 
     # Create QR code instance
     qr = qrcode.QRCode(
         version=None,  # Auto-detect version based on data
-        error_correction=error_correction_map.get(error_correction, qrcode.constants.ERROR_CORRECT_M),
+        error_correction=ERROR_CORRECTION_MAP.get(error_correction, qrcode.constants.ERROR_CORRECT_M),
         box_size=10,
         border=4,
     )
 
     qr.add_data(data)
     qr.make(fit=True)
+    _fit_box_size(qr, size)
 
     # Create image with custom colors
     img = qr.make_image(
@@ -60,12 +120,11 @@ def generate_qr_code(
     )
 
     # Resize to desired size
-    img = img.resize((size, size), Image.LANCZOS)
+    img = _resize_to(img, size)
 
     # Save to BytesIO
-    buffer = io.BytesIO()
-    img.save(buffer, format=format)
-    buffer.seek(0)
+    buffer = _encode_image(img, format)
+    cache.set(cache_key, buffer.getvalue(), QR_IMAGE_CACHE_TIMEOUT)
 
     logger.info(
         "qr_code_generated",
@@ -101,22 +160,24 @@ def generate_qr_code_styled(
     Returns:
         BytesIO object containing the styled QR code
     """
-    error_correction_map = {
-        'L': qrcode.constants.ERROR_CORRECT_L,
-        'M': qrcode.constants.ERROR_CORRECT_M,
-        'Q': qrcode.constants.ERROR_CORRECT_Q,
-        'H': qrcode.constants.ERROR_CORRECT_H,
-    }
+    cache_key = _qr_image_cache_key(
+        data, size, error_correction, foreground_color, background_color,
+        style, format
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return io.BytesIO(cached)
 
     qr = qrcode.QRCode(
         version=None,
-        error_correction=error_correction_map.get(error_correction, qrcode.constants.ERROR_CORRECT_M),
+        error_correction=ERROR_CORRECTION_MAP.get(error_correction, qrcode.constants.ERROR_CORRECT_M),
         box_size=10,
         border=4,
     )
 
     qr.add_data(data)
     qr.make(fit=True)
+    _fit_box_size(qr, size)
 
     # Create styled image
     if style == 'rounded':
@@ -133,26 +194,48 @@ def generate_qr_code_styled(
         )
 
     # Resize
-    img = img.resize((size, size), Image.LANCZOS)
+    img = _resize_to(img, size)
 
     # Save to buffer
-    buffer = io.BytesIO()
-    img.save(buffer, format=format)
-    buffer.seek(0)
+    buffer = _encode_image(img, format)
+    cache.set(cache_key, buffer.getvalue(), QR_IMAGE_CACHE_TIMEOUT)
 
     return buffer
 
 
-def parse_user_agent(user_agent_string):
-    """
-    Parse user agent string to extract device information.
-
-    Args:
-        user_agent_string: The user agent string from request
+# Link previewers and HTTP clients that make up much of scan traffic; these
+# are recognised by substring without running the full user agent parser.
+BOT_USER_AGENT_MARKERS = (
+    'Googlebot',
+    'bingbot',
+    'facebookexternalhit',
+    'WhatsApp',
+    'Slackbot',
+    'TelegramBot',
+    'Twitterbot',
+    'curl/',
+    'python-requests',
+)
+
+# All markers as one alternation, so a user agent is scanned once
+_BOT_USER_AGENT_RE = re.compile('|'.join(map(re.escape, BOT_USER_AGENT_MARKERS)))
+
+
+@lru_cache(maxsize=4096)
+def _parse_user_agent_cached(user_agent_string):
+    """Parse a user agent string; popular strings recur constantly."""
+    match = _BOT_USER_AGENT_RE.search(user_agent_string)
+    if match:
+        return {
+            'device_type': 'bot',
+            'browser': match.group().rstrip('/'),
+            'operating_system': '',
+            'is_mobile': False,
+            'is_tablet': False,
+            'is_pc': False,
+            'is_bot': True,
+        }
 
-    Returns:
-        dict with device_type, browser, os information
-    """
     user_agent = parse(user_agent_string)
 
     # Determine device type
@@ -176,6 +259,25 @@ def parse_user_agent(user_agent_string):
     }
 
 
+def is_bot_user_agent(user_agent_string):
+    """Check whether a user agent belongs to a known link previewer or client."""
+    return _BOT_USER_AGENT_RE.search(user_agent_string) is not None
+
+
+def parse_user_agent(user_agent_string):
+    """
+    Parse user agent string to extract device information.
+
+    Args:
+        user_agent_string: The user agent string from request
+
+    Returns:
+        dict with device_type, browser, os information
+    """
+    # Copy so callers can't mutate the cached result
+    return dict(_parse_user_agent_cached(user_agent_string))
+
+
 def get_client_ip(request):
     """
     Get the client's IP address from the request.
@@ -196,24 +298,29 @@ def generate_visitor_id(request):
 
     This is a simple implementation. For production, consider
     using cookies or more sophisticated fingerprinting.
-    """
-    import hashlib
 
+    The ID only needs to be stable, not secret, so a fast non-cryptographic
+    hash is used rather than SHA-256.
+    """
     ip = get_client_ip(request)
     user_agent = request.META.get('HTTP_USER_AGENT', '')
 
-    # Create a hash of IP + User Agent
-    unique_string = f"{ip}:{user_agent}"
-    visitor_id = hashlib.sha256(unique_string.encode()).hexdigest()
+    # Hash IP + User Agent, feeding bytes directly rather than building
+    # an intermediate "ip:user_agent" string
+    hasher = xxhash.xxh3_128()
+    hasher.update((ip or '').encode('ascii', 'ignore'))
+    hasher.update(b':')
+    hasher.update(user_agent.encode('utf-8', 'ignore'))
 
-    return visitor_id
+    return hasher.hexdigest()
 
 
 def check_password(stored_password, input_password):
     """
     Check if the input password matches the stored password.
 
-    For simple implementation, we're using plain text comparison.
+    Passwords are stored in plain text, so compare in constant time to
+    avoid leaking length/prefix information through response timing.
     For production, consider using Django's password hashing.
     """
-    return stored_password == input_password
+    return hmac.compare_digest(stored_password.encode(), input_password.encode())
@@ -1,32 +1,74 @@
 """
 Views for QR code generation and management.
 """
+from collections import Counter
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.paginator import Paginator
 from django.http import HttpResponse, JsonResponse, Http404
 from django.views.decorators.http import require_http_methods
 from django.db.models import Q, Count
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from django.urls import reverse
 import structlog
 
-from .models import QRCode, QRScan
+from .models import QRCode
+from .tasks import enqueue_scan
 from .utils import (
     generate_qr_code,
-    parse_user_agent,
     get_client_ip,
     generate_visitor_id,
-    check_password
+    check_password,
+    is_bot_user_agent
 )
 
 logger = structlog.get_logger(__name__)
 
+# QR codes shown per page in qr_code_list
+QR_CODES_PER_PAGE = 25
+
+# How long link previewers may cache a redirect they are served
+BOT_REDIRECT_MAX_AGE = 60 * 5  # 5 minutes
+
+# Columns qr_code_list renders; skips the TEXT description/tags columns.
+LIST_FIELDS = (
+    'name',
+    'qr_type',
+    'destination_url',
+    'total_scans',
+    'unique_scans',
+    'created_at',
+)
+
+
+def _split_breakdowns(rows, *fields):
+    """
+    Split rows from one query grouped by several fields into a per-field
+    breakdown, so a single scan of QRScan serves every breakdown.
+
+    Returns:
+        dict mapping each field to a list of {field: value, 'count': n}
+        dicts ordered by count, highest first
+    """
+    rows = list(rows)
+    breakdowns = {}
+    for field in fields:
+        totals = Counter()
+        for row in rows:
+            totals[row[field]] += row['count']
+        breakdowns[field] = [
+            {field: value, 'count': count}
+            for value, count in totals.most_common()
+        ]
+    return breakdowns
+
 
 @login_required
 def qr_code_list(request):
     """List all QR codes for the current user."""
-    qr_codes = QRCode.objects.filter(user=request.user).select_related('user')
+    qr_codes = QRCode.objects.filter(user=request.user).only(*LIST_FIELDS)
 
     # Filter by search query
     search_query = request.GET.get('search', '')
@@ -47,8 +89,17 @@ def qr_code_list(request):
     if status in ['active', 'paused', 'expired']:
         qr_codes = qr_codes.filter(status=status)
 
+    # Only fetch one page of QR codes
+    paginator = Paginator(qr_codes.order_by('-created_at'), QR_CODES_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    # Preserve the active filters in pagination links
+    filter_params = request.GET.copy()
+    filter_params.pop('page', None)
+
     context = {
-        'qr_codes': qr_codes,
+        'page_obj': page_obj,
+        'filter_query': filter_params.urlencode(),
         'search_query': search_query,
         'selected_type': qr_type,
         'selected_status': status,
@@ -119,8 +170,12 @@ def qr_code_detail(request, pk):
     """View details of a specific QR code."""
     qr_code = get_object_or_404(QRCode, pk=pk, user=request.user)
 
-    # Get recent scans
-    recent_scans = qr_code.scans.all()[:10]
+    # Get recent scans, fetching only the columns the table shows
+    recent_scans = list(
+        qr_code.scans.only(
+            'qr_code', 'scanned_at', 'device_type', 'browser', 'city'
+        )[:10]
+    )
 
     # Get scan statistics
     scan_stats = {
@@ -129,22 +184,10 @@ def qr_code_detail(request, pk):
         'last_scan': qr_code.last_scanned_at,
     }
 
-    # Get device breakdown
-    device_stats = qr_code.scans.values('device_type').annotate(
-        count=Count('id')
-    ).order_by('-count')
-
-    # Get browser breakdown
-    browser_stats = qr_code.scans.values('browser').annotate(
-        count=Count('id')
-    ).order_by('-count')[:5]
-
     context = {
         'qr_code': qr_code,
         'recent_scans': recent_scans,
         'scan_stats': scan_stats,
-        'device_stats': device_stats,
-        'browser_stats': browser_stats,
         'short_url': qr_code.get_full_short_url(request) if qr_code.qr_type == 'dynamic' else None,
     }
 
@@ -252,7 +295,7 @@ def qr_redirect(request, short_code):
     """
     # Get QR code by short code
     try:
-        qr_code = QRCode.objects.get(short_code=short_code)
+        qr_code = QRCode.get_for_redirect(short_code)
     except QRCode.DoesNotExist:
         logger.warning("qr_redirect_not_found", short_code=short_code)
         raise Http404("QR code not found")
@@ -280,42 +323,34 @@ def qr_redirect(request, short_code):
                 'short_code': short_code,
             })
 
-    # Parse user agent
+    # Link previewers and HEAD probes aren't scans: redirect them without
+    # recording anything, and let them cache the answer. Only privately: a
+    # CDN or shared proxy would replay this redirect to real scanners, whose
+    # scans would then go unrecorded and bypass pausing and scan limits
     user_agent_string = request.META.get('HTTP_USER_AGENT', '')
-    ua_info = parse_user_agent(user_agent_string)
-
-    # Generate visitor ID
-    visitor_id = generate_visitor_id(request)
-
-    # Check if this is a unique visitor
-    is_unique_visitor = not QRScan.objects.filter(
-        qr_code=qr_code,
-        visitor_id=visitor_id
-    ).exists()
-
-    # Record the scan
-    scan = QRScan.objects.create(
-        qr_code=qr_code,
-        ip_address=get_client_ip(request),
-        user_agent=user_agent_string,
-        referer=request.META.get('HTTP_REFERER', ''),
-        device_type=ua_info['device_type'],
-        browser=ua_info['browser'],
-        operating_system=ua_info['operating_system'],
-        visitor_id=visitor_id,
-        is_unique_visitor=is_unique_visitor,
-        was_successful=True,
-    )
-
-    # Update QR code scan counts
-    qr_code.increment_scan_count(is_unique=is_unique_visitor)
+    if request.method == 'HEAD' or is_bot_user_agent(user_agent_string):
+        response = redirect(qr_code.destination_url)
+        if not qr_code.password:
+            patch_cache_control(response, private=True, max_age=BOT_REDIRECT_MAX_AGE)
+        return response
+
+    # Record the scan off the request path; user agent parsing, the
+    # unique-visitor check, the scan INSERT and the counter UPDATE all
+    # happen in the task. Scans of a code with a scan limit are written
+    # before redirecting: buffered, they'd only reach total_scans at the next
+    # flush, and can_scan() would let the limit be overrun until then
+    enqueue_scan(qr_code.id, {
+        'ip_address': get_client_ip(request),
+        'user_agent': user_agent_string,
+        'referer': request.META.get('HTTP_REFERER', ''),
+        'visitor_id': generate_visitor_id(request),
+        'scanned_at': timezone.now().isoformat(),
+    }, wait=qr_code.max_scans is not None)
 
     logger.info(
         "qr_redirect_success",
         qr_code_id=qr_code.id,
-        short_code=short_code,
-        device_type=ua_info['device_type'],
-        is_unique=is_unique_visitor
+        short_code=short_code
     )
 
     # Redirect to destination
@@ -334,37 +369,30 @@ def qr_analytics(request, pk):
     # Get scans in time range
     scans = qr_code.scans.filter(scanned_at__gte=start_date)
 
-    # Device breakdown
-    device_stats = scans.values('device_type').annotate(
-        count=Count('id')
-    ).order_by('-count')
-
-    # Browser breakdown
-    browser_stats = scans.values('browser').annotate(
-        count=Count('id')
-    ).order_by('-count')
-
-    # OS breakdown
-    os_stats = scans.values('operating_system').annotate(
-        count=Count('id')
-    ).order_by('-count')
+    # Device, browser and OS breakdowns from a single grouped query
+    breakdowns = _split_breakdowns(
+        scans.values('device_type', 'browser', 'operating_system').annotate(
+            count=Count('id')
+        ).order_by(),
+        'device_type', 'browser', 'operating_system'
+    )
 
     # Scans over time (by day)
     from django.db.models.functions import TruncDate
-    scans_by_date = scans.annotate(
+    scans_by_date = list(scans.annotate(
         date=TruncDate('scanned_at')
     ).values('date').annotate(
         count=Count('id')
-    ).order_by('date')
+    ).order_by('date'))
 
     context = {
         'qr_code': qr_code,
         'days': days,
-        'total_scans': scans.count(),
-        'device_stats': device_stats,
-        'browser_stats': browser_stats,
-        'os_stats': os_stats,
-        'scans_by_date': list(scans_by_date),
+        'total_scans': sum(row['count'] for row in scans_by_date),
+        'device_stats': breakdowns['device_type'],
+        'browser_stats': breakdowns['browser'],
+        'os_stats': breakdowns['operating_system'],
+        'scans_by_date': scans_by_date,
     }
 
     return render(request, 'qr_codes/qr_analytics.html', context)
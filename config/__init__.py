@@ -0,0 +1,8 @@
+# Load the Celery app when Celery is installed (USE_CELERY) so that
+# @shared_task functions bind to it.
+try:
+    from .celery import app as celery_app
+except ImportError:
+    celery_app = None
+
+__all__ = ('celery_app',)
@@ -0,0 +1,15 @@
+"""
+Celery application for qrgenerator.
+
+Only used when USE_CELERY is enabled; start a worker with:
+    celery -A config worker -l info
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.production')
+
+app = Celery('qrgenerator')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -24,6 +24,10 @@ DEBUG = config('DEBUG', default=False, cast=bool)
 
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=Csv())
 
+# Public base URL for short links (e.g. https://qr.example.com); when unset
+# it is taken from each request's host
+SITE_URL = config('SITE_URL', default='').rstrip('/')
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -23,28 +23,20 @@ INSTALLED_APPS += [
     'django_extensions',
 ]
 
-# Development middleware
-if DEBUG:
-    # Browser reload (only if installed)
-    try:
-        import django_browser_reload
-        INSTALLED_APPS += ['django_browser_reload']
-        MIDDLEWARE = ['django_browser_reload.middleware.BrowserReloadMiddleware'] + MIDDLEWARE
-    except ImportError:
-        pass
+# Development middleware, opted into with USE_BROWSER_RELOAD and
+# USE_DEBUG_TOOLBAR so startup doesn't pay for failed imports
+if DEBUG and config('USE_BROWSER_RELOAD', default=False, cast=bool):
+    INSTALLED_APPS += ['django_browser_reload']
+    MIDDLEWARE = ['django_browser_reload.middleware.BrowserReloadMiddleware'] + MIDDLEWARE
 
-    # Debug toolbar (only if installed)
-    try:
-        import debug_toolbar
-        INSTALLED_APPS += ['debug_toolbar']
-        MIDDLEWARE = ['debug_toolbar.middleware.DebugToolbarMiddleware'] + MIDDLEWARE
-        INTERNAL_IPS = ['127.0.0.1', 'localhost']
+if DEBUG and config('USE_DEBUG_TOOLBAR', default=False, cast=bool):
+    INSTALLED_APPS += ['debug_toolbar']
+    MIDDLEWARE = ['debug_toolbar.middleware.DebugToolbarMiddleware'] + MIDDLEWARE
+    INTERNAL_IPS = ['127.0.0.1', 'localhost']
 
-        DEBUG_TOOLBAR_CONFIG = {
-            'SHOW_TOOLBAR_CALLBACK': lambda request: DEBUG,
-        }
-    except ImportError:
-        pass
+    DEBUG_TOOLBAR_CONFIG = {
+        'SHOW_TOOLBAR_CALLBACK': lambda request: DEBUG,
+    }
 
 # Email backend for development
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
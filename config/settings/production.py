@@ -37,6 +37,12 @@ CACHES = {
         'LOCATION': config('REDIS_URL', default='redis://redis:6379/0'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            # redis-py picks the C hiredis parser automatically when installed
+            'CONNECTION_POOL_KWARGS': {
+                'max_connections': config('REDIS_MAX_CONNECTIONS', default=100, cast=int),
+            },
+            # A Redis outage degrades to cache misses instead of errors
+            'IGNORE_EXCEPTIONS': True,
         }
     }
 } if config('REDIS_URL', default=None) else {
@@ -46,6 +52,9 @@ CACHES = {
     }
 }
 
+# Still log the Redis errors IGNORE_EXCEPTIONS swallows
+DJANGO_REDIS_LOG_IGNORED_EXCEPTIONS = True
+
 # Email settings for production
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
@@ -102,7 +111,9 @@ if SENTRY_DSN:
 
 # Database optimizations for production
 DATABASES['default'].update({
-    'CONN_MAX_AGE': 60,  # Keep connections alive for 60 seconds
+    'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=300, cast=int),  # Keep connections alive between requests
+    'CONN_HEALTH_CHECKS': True,  # Verify reused connections before each request
+    'ATOMIC_REQUESTS': False,  # Scan recording opens its own transaction
     'OPTIONS': {
         'connect_timeout': 10,  # Connection timeout in seconds
     }
@@ -114,7 +125,8 @@ LOGGING['handlers']['file']['level'] = 'WARNING'
 LOGGING['root']['level'] = 'WARNING'
 
 # Additional production apps
-if config('USE_CELERY', default=False, cast=bool):
+USE_CELERY = config('USE_CELERY', default=False, cast=bool)
+if USE_CELERY:
     INSTALLED_APPS += [
         'django_celery_beat',
         'django_celery_results',
@@ -129,6 +141,15 @@ if config('USE_CELERY', default=False, cast=bool):
     CELERY_TIMEZONE = TIME_ZONE
     CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+    # Buffer QR scans in Redis and write them in batches
+    SCAN_BUFFER_ENABLED = config('SCAN_BUFFER_ENABLED', default=True, cast=bool)
+    CELERY_BEAT_SCHEDULE = {
+        'flush-scan-buffer': {
+            'task': 'qr_codes.flush_scan_buffer',
+            'schedule': config('SCAN_BUFFER_FLUSH_SECONDS', default=10.0, cast=float),
+        },
+    }
+
 # API settings (if using DRF)
 if 'rest_framework' in INSTALLED_APPS:
     REST_FRAMEWORK = {
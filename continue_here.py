@@ -8,6 +8,8 @@ structure has been created by setup_new_project.py.
 Run this from your NEW project directory (not BuildTemplate).
 """
 
+import os
+import shutil
 import subprocess
 import sys
 from pathlib import Path
@@ -21,6 +23,17 @@ class ContinueSetup:
         self.project_name = "qrgenerator"
         self.python_version = "3.13.1"
         self.venv_python = None  # Will be set after creating virtualenv
+        self.uv_pending = False  # Set when UV should be installed with dependencies
+        self.dependencies_installed = False  # Set once step 4 succeeds
+        self._venv_env = None  # Built once by _get_env()
+
+        # Files and directories the steps look for
+        self.manage_py = self.project_dir / "manage.py"
+        self.config_settings = self.project_dir / "config" / "settings"
+        self.core_app = self.project_dir / "apps" / "core"
+        self.makefile = self.project_dir / "Makefile"
+        self.git_dir = self.project_dir / ".git"
+        self.pyenv_python_path = Path.home() / ".pyenv" / "versions" / self.project_name / "bin" / "python"
 
     def print_header(self, text):
         """Print a formatted header."""
@@ -34,38 +47,28 @@ class ContinueSetup:
         print(f"📍 Step {number}: {text}")
         print('─' * 60)
 
-    def run_command(self, cmd, description, check=True, shell=False, show_output=True, env=None):
-        """Run a command and handle errors."""
+    def run_command(self, cmd, description, check=True, show_output=True, env=None):
+        """Run a command (an argv list) and handle errors."""
         print(f"\n▶ {description}")
-        print(f"  Command: {cmd if isinstance(cmd, str) else ' '.join(cmd)}")
+        # Leave stdout's own buffering alone (block-buffered when piped) and
+        # flush only here, so our lines land before the child's output
+        print(f"  Command: {' '.join(cmd)}", flush=True)
 
         try:
             if show_output:
                 # Don't capture output - show it in real-time
-                if shell:
-                    result = subprocess.run(cmd, shell=True, check=check, env=env)
-                else:
-                    result = subprocess.run(cmd, check=check, env=env)
-
-                if result.returncode == 0:
-                    print("✅ Success")
-                return True
+                result = subprocess.run(cmd, check=check, env=env)
             else:
-                # Capture output (for quick commands)
-                if shell:
-                    result = subprocess.run(cmd, shell=True, check=check, capture_output=True, text=True, env=env)
-                else:
-                    result = subprocess.run(cmd, check=check, capture_output=True, text=True, env=env)
+                # Capture output (for quick commands); kept as bytes and only
+                # decoded when there is something to print
+                result = subprocess.run(cmd, check=check, capture_output=True, env=env)
 
                 if result.stdout:
-                    print(result.stdout)
-                if result.returncode == 0:
-                    print("✅ Success")
-                return True
+                    print(result.stdout.decode(errors='replace'))
         except subprocess.CalledProcessError as e:
             print(f"❌ Error: {e}")
             if hasattr(e, 'stderr') and e.stderr:
-                print(f"   {e.stderr}")
+                print(f"   {e.stderr.decode(errors='replace')}")
             if check:
                 raise
             return False
@@ -73,21 +76,59 @@ class ContinueSetup:
             print(f"❌ Command not found")
             return False
 
+        # With check=False a failing command doesn't raise; report it here
+        # so callers can tell it apart from a success
+        if result.returncode != 0:
+            print(f"❌ Exited with status {result.returncode}")
+            return False
+        print("✅ Success")
+        return True
+
+    def _resolve_venv_python(self):
+        """Point venv_python at the virtualenv's interpreter if it exists."""
+        if self.pyenv_python_path.exists():
+            self.venv_python = str(self.pyenv_python_path)
+        return self.venv_python is not None
+
+    def _get_env(self):
+        """
+        Return the environment for commands that should run in the virtualenv.
+
+        Built once and reused by every step, so all of them see the same
+        PATH. Returns None (inherit the current environment) when no
+        virtualenv is in use.
+        """
+        if self.venv_python is None:
+            return None
+        if self._venv_env is None:
+            env = os.environ.copy()
+            venv_bin = Path(self.venv_python).parent
+            env['PATH'] = f"{venv_bin}:{env.get('PATH', '')}"
+            env['VIRTUAL_ENV'] = str(venv_bin.parent)
+            # Keep pyenv-virtualenv's prompt hook out of make/pip subshells
+            env['PYENV_VIRTUALENV_DISABLE_PROMPT'] = '1'
+            self._venv_env = env
+        return self._venv_env
+
     def create_pyenv(self):
         """Create and activate Python environment."""
-        self.print_step(1, "Creating Python Environment")
+        self.print_step(2, "Creating Python Environment")
+
+        # An existing virtualenv is found with a single stat, without
+        # starting any pyenv processes
+        if self._resolve_venv_python():
+            print(f"✅ Environment '{self.project_name}' already exists")
+            return True
 
         # Check if pyenv is installed
-        try:
-            subprocess.run(['pyenv', '--version'], capture_output=True, check=True)
-        except (FileNotFoundError, subprocess.CalledProcessError):
+        if shutil.which('pyenv') is None:
             print("⚠️  pyenv not found. Skipping virtual environment creation.")
             print("   You can install pyenv later or use venv:")
             print(f"   python3 -m venv .venv")
             print(f"   source .venv/bin/activate")
             return False
 
-        # Check if environment already exists
+        # Check if environment already exists outside ~/.pyenv
         result = subprocess.run(
             ['pyenv', 'virtualenvs', '--bare'],
             capture_output=True,
@@ -96,10 +137,6 @@ class ContinueSetup:
 
         if self.project_name in result.stdout:
             print(f"✅ Environment '{self.project_name}' already exists")
-            # Set the virtualenv Python path
-            pyenv_root = Path.home() / ".pyenv" / "versions" / self.project_name / "bin" / "python"
-            if pyenv_root.exists():
-                self.venv_python = str(pyenv_root)
             return True
 
         # Create environment
@@ -110,108 +147,86 @@ class ContinueSetup:
         )
 
         if success:
-            # Set the virtualenv Python path
-            pyenv_root = Path.home() / ".pyenv" / "versions" / self.project_name / "bin" / "python"
-            if pyenv_root.exists():
-                self.venv_python = str(pyenv_root)
-                print(f"\n✅ Environment created!")
+            print(f"\n✅ Environment created!")
+            if self._resolve_venv_python():
                 print(f"   Using: {self.venv_python}")
             else:
-                print(f"\n✅ Environment created!")
                 print(f"   It will auto-activate when you cd into this directory")
                 print(f"   (thanks to .python-version file)")
 
         return success
 
     def install_uv(self):
-        """Install UV package manager."""
-        self.print_step(2, "Installing UV Package Manager (Optional)")
-
-        # Use virtualenv Python if available, otherwise system Python
-        python_cmd = self.venv_python or sys.executable
+        """Decide whether to install UV package manager."""
+        self.print_step(3, "Installing UV Package Manager (Optional)")
 
         # Check if already installed
-        try:
-            subprocess.run(['uv', '--version'], capture_output=True, check=True)
+        if shutil.which('uv') is not None:
             print("✅ UV already installed")
             return True
-        except (FileNotFoundError, subprocess.CalledProcessError):
-            pass
 
         print("UV is 10-100x faster than pip!")
         if input("Install UV? (Y/n): ").lower() != 'n':
-            return self.run_command(
-                [python_cmd, '-m', 'pip', 'install', 'uv'],
-                "Installing UV via pip",
-                check=False
-            )
+            # Installed in the same pip run as the dependencies, so pip only
+            # starts up and resolves once
+            self.uv_pending = True
+            print("📦 UV will be installed along with the dependencies")
+            return True
         else:
             print("⏭️  Skipping UV installation")
             return False
 
     def install_dependencies(self):
         """Install project dependencies."""
-        self.print_step(3, "Installing Dependencies")
+        self.print_step(4, "Installing Dependencies")
 
         print("\n⏱️  This may take a few minutes on first run...")
 
         # Use virtualenv Python if available
         python_cmd = self.venv_python or sys.executable
 
-        makefile = self.project_dir / "Makefile"
-        if not makefile.exists():
-            print("⚠️  Makefile not found. Installing manually...")
+        if self.uv_pending or not self.makefile.exists():
+            if not self.makefile.exists():
+                print("⚠️  Makefile not found. Installing manually...")
+            packages = ['uv'] if self.uv_pending else []
             return self.run_command(
-                [python_cmd, '-m', 'pip', 'install', '-r', 'requirements/development.txt'],
+                [python_cmd, '-m', 'pip', 'install', *packages, '-r', 'requirements/development.txt'],
                 "Installing dependencies with pip",
                 check=False
             )
 
         # Set up environment to use virtualenv
-        import os
-        env = os.environ.copy()
-        if self.venv_python:
-            venv_bin = str(Path(self.venv_python).parent)
-            env['PATH'] = f"{venv_bin}:{env.get('PATH', '')}"
-            env['VIRTUAL_ENV'] = str(Path(self.venv_python).parent.parent)
+        env = self._get_env()
+        if env:
             print(f"   Using virtualenv: {env['VIRTUAL_ENV']}")
 
-        # Try using make commands with virtualenv activated
-        self.run_command(
-            ['make', 'install-uv'],
-            "Installing UV via Makefile",
-            check=False,
-            env=env if self.venv_python else None
-        )
-
+        # Try using make commands with virtualenv activated; make install
+        # picks up UV if it is already on PATH
         return self.run_command(
             ['make', 'install'],
             "Installing all dependencies",
             check=False,
-            env=env if self.venv_python else None
+            env=env
         )
 
     def verify_django_setup(self):
         """Verify Django project is properly set up."""
-        self.print_step(4, "Verifying Django Project")
+        self.print_step(1, "Verifying Django Project")
 
         # Check if manage.py exists
-        manage_py = self.project_dir / "manage.py"
-        if not manage_py.exists():
+        if not self.manage_py.exists():
             print("❌ manage.py not found!")
             print("   This script expects a project created by setup_new_project.py")
             return False
 
         # Check if config/settings exists
-        config_settings = self.project_dir / "config" / "settings"
-        if not config_settings.exists():
+        if not self.config_settings.exists():
             print("❌ config/settings/ not found!")
             print("   This script expects a project created by setup_new_project.py")
             return False
 
         # Check if core app exists
-        core_app = self.project_dir / "apps" / "core"
-        if not core_app.exists():
+        if not self.core_app.exists():
             print("❌ apps/core/ not found!")
             print("   This script expects a project created by setup_new_project.py")
             return False
@@ -227,18 +242,14 @@ class ContinueSetup:
         python_cmd = self.venv_python or 'python'
 
         # Set up environment to use virtualenv
-        import os
-        env = None
-        if self.venv_python:
-            env = os.environ.copy()
-            venv_bin = str(Path(self.venv_python).parent)
-            env['PATH'] = f"{venv_bin}:{env.get('PATH', '')}"
-            env['VIRTUAL_ENV'] = str(Path(self.venv_python).parent.parent)
+        env = self._get_env()
 
-        makefile = self.project_dir / "Makefile"
-        if makefile.exists():
+        if self.makefile.exists():
+            # make setup depends on make install; when step 4 already
+            # installed everything, -o stops make from running it again
+            skip_install = ['-o', 'install'] if self.dependencies_installed else []
             return self.run_command(
-                ['make', 'setup'],
+                ['make', *skip_install, 'setup'],
                 "Running make setup (migrations, pre-commit hooks, etc.)",
                 check=False,
                 env=env
@@ -257,9 +268,7 @@ class ContinueSetup:
         """Initialize git repository and create initial commit."""
         self.print_step(6, "Initializing Git Repository")
 
-        git_dir = self.project_dir / ".git"
-
-        if git_dir.exists():
+        if self.git_dir.exists():
             print("✅ Git repository already initialized")
         else:
             self.run_command(
@@ -268,17 +277,22 @@ class ContinueSetup:
                 check=True
             )
 
-        # Check if there are uncommitted changes
-        result = subprocess.run(
-            ['git', 'status', '--porcelain'],
-            capture_output=True,
-            text=True
-        )
-
-        if result.stdout.strip():
+        # Check if there are uncommitted changes; any output at all means
+        # there are, so stop at the first byte instead of reading the listing
+        with subprocess.Popen(
+            ['git', '-c', 'core.untrackedCache=true', 'status', '--porcelain', '-z'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        ) as proc:
+            has_changes = bool(proc.stdout.read(1))
+            proc.terminate()
+
+        if has_changes:
             if input("\nCreate initial commit? (Y/n): ").lower() != 'n':
+                # Keep an untracked-file cache in the index so later scans
+                # skip directories that haven't changed
                 self.run_command(
-                    ['git', 'add', '.'],
+                    ['git', '-c', 'core.untrackedCache=true', 'add', '.'],
                     "Staging all files",
                     check=False
                 )
@@ -342,10 +356,10 @@ This script will help you complete your project setup.
 🐍 Python version: {self.python_version}
 
 We'll automate:
-  1. Creating Python environment
-  2. Installing UV (optional)
-  3. Installing dependencies
-  4. Verifying Django project
+  1. Verifying Django project
+  2. Creating Python environment
+  3. Installing UV (optional)
+  4. Installing dependencies
   5. Running migrations
   6. Initializing git
 
@@ -359,14 +373,15 @@ Press Ctrl+C at any time to stop.
             return
 
         try:
-            # Run each step
-            self.create_pyenv()
-            self.install_uv()
-            self.install_dependencies()
+            # Run each step; verification is a few stat calls, so do it
+            # first rather than after minutes of installing dependencies
             if not self.verify_django_setup():
                 print("\n❌ Django project verification failed")
                 print("   This script only works with projects created by setup_new_project.py")
                 sys.exit(1)
+            self.create_pyenv()
+            self.install_uv()
+            self.dependencies_installed = self.install_dependencies()
             self.run_initial_setup()
             self.initialize_git()
 
@@ -0,0 +1,7 @@
+"""
+Model factories shared by the test suites.
+"""
+from .accounts import UserFactory
+from .qr_codes import QRCodeFactory
+
+__all__ = ['QRCodeFactory', 'UserFactory']
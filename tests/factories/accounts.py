@@ -0,0 +1,19 @@
+"""
+Factories for the accounts app.
+"""
+import factory
+from factory.django import DjangoModelFactory
+
+from apps.accounts.models import User
+
+
+class UserFactory(DjangoModelFactory):
+    """Factory for creating User instances."""
+
+    class Meta:
+        model = User
+        skip_postgeneration_save = True
+
+    username = factory.Sequence(lambda n: f"user{n}")
+    email = factory.LazyAttribute(lambda user: f"{user.username}@example.com")
+    password = factory.django.Password("testpass123")
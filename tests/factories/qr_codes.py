@@ -0,0 +1,21 @@
+"""
+Factories for the qr_codes app.
+"""
+import factory
+from factory.django import DjangoModelFactory
+
+from apps.qr_codes.models import QRCode
+
+from .accounts import UserFactory
+
+
+class QRCodeFactory(DjangoModelFactory):
+    """Factory for creating QRCode instances; dynamic, so save() assigns a short code."""
+
+    class Meta:
+        model = QRCode
+
+    user = factory.SubFactory(UserFactory)
+    name = factory.Sequence(lambda n: f"QR code {n}")
+    qr_type = "dynamic"
+    destination_url = factory.Sequence(lambda n: f"https://example.com/{n}/")
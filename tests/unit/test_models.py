@@ -0,0 +1,126 @@
+"""
+Tests for the QRCode model.
+"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.qr_codes import models
+from apps.qr_codes.models import QRCode
+from tests.factories import QRCodeFactory
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReserveShortCodeTests(TestCase):
+    """reserve_short_code() skips codes another process already holds."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_reserved_codes_are_skipped(self):
+        cache.add('qr:sc:taken', 1)
+
+        with mock.patch.object(models, 'generate_short_code', side_effect=['taken', 'free']):
+            self.assertEqual(models.reserve_short_code(), 'free')
+        self.assertIsNotNone(cache.get('qr:sc:free'))
+
+    def test_gives_up_reserving_after_max_attempts(self):
+        codes = [f'taken{i}' for i in range(models.SHORT_CODE_MAX_ATTEMPTS)]
+        for code in codes:
+            cache.add(f'qr:sc:{code}', 1)
+
+        with mock.patch.object(
+            models, 'generate_short_code', side_effect=[*codes, 'fallback']
+        ) as generate:
+            self.assertEqual(models.reserve_short_code(), 'fallback')
+        self.assertEqual(generate.call_count, models.SHORT_CODE_MAX_ATTEMPTS + 1)
+        self.assertIsNone(cache.get('qr:sc:fallback'))
+
+    def test_save_assigns_a_short_code_to_dynamic_qr_codes(self):
+        qr_code = QRCodeFactory()
+
+        self.assertEqual(len(qr_code.short_code), 8)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GetForRedirectTests(TestCase):
+    """get_for_redirect() serves hot short codes from the cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.qr_code = QRCodeFactory()
+
+    def test_repeat_lookups_are_served_from_the_cache(self):
+        QRCode.get_for_redirect(self.qr_code.short_code)
+
+        with self.assertNumQueries(0):
+            qr_code = QRCode.get_for_redirect(self.qr_code.short_code)
+        self.assertEqual(qr_code.pk, self.qr_code.pk)
+
+    def test_save_invalidates_the_cached_lookup(self):
+        QRCode.get_for_redirect(self.qr_code.short_code)
+
+        self.qr_code.destination_url = 'https://example.com/new/'
+        self.qr_code.save()
+
+        qr_code = QRCode.get_for_redirect(self.qr_code.short_code)
+        self.assertEqual(qr_code.destination_url, 'https://example.com/new/')
+
+    def test_delete_invalidates_the_cached_lookup(self):
+        short_code = self.qr_code.short_code
+        QRCode.get_for_redirect(short_code)
+
+        self.qr_code.delete()
+
+        with self.assertRaises(QRCode.DoesNotExist):
+            QRCode.get_for_redirect(short_code)
+
+    def test_unknown_short_codes_are_cached_as_misses(self):
+        with self.assertRaises(QRCode.DoesNotExist):
+            QRCode.get_for_redirect('unknown')
+
+        with self.assertNumQueries(0), self.assertRaises(QRCode.DoesNotExist):
+            QRCode.get_for_redirect('unknown')
+
+    def test_codes_under_their_scan_limit_are_read_live(self):
+        self.qr_code.max_scans = 2
+        self.qr_code.save()
+        QRCode.get_for_redirect(self.qr_code.short_code)
+
+        QRCode.increment_scan_counts(self.qr_code.pk)
+        with self.assertNumQueries(1):
+            qr_code = QRCode.get_for_redirect(self.qr_code.short_code)
+        self.assertEqual(qr_code.total_scans, 1)
+        self.assertTrue(qr_code.can_scan()[0])
+
+    def test_codes_at_their_scan_limit_are_cached_and_blocked(self):
+        self.qr_code.max_scans = 1
+        self.qr_code.save()
+        QRCode.increment_scan_counts(self.qr_code.pk)
+        QRCode.get_for_redirect(self.qr_code.short_code)
+
+        with self.assertNumQueries(0):
+            qr_code = QRCode.get_for_redirect(self.qr_code.short_code)
+        self.assertEqual(qr_code.can_scan(), (False, "Maximum scan limit reached"))
+
+    def test_raising_the_scan_limit_unblocks_a_cached_code(self):
+        self.qr_code.max_scans = 1
+        self.qr_code.save()
+        QRCode.increment_scan_counts(self.qr_code.pk)
+        QRCode.get_for_redirect(self.qr_code.short_code)
+
+        self.qr_code.refresh_from_db()
+        self.qr_code.max_scans = 5
+        self.qr_code.save()
+
+        qr_code = QRCode.get_for_redirect(self.qr_code.short_code)
+        self.assertTrue(qr_code.can_scan()[0])
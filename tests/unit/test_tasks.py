@@ -0,0 +1,222 @@
+"""
+Tests for scan recording and the Redis scan buffer.
+"""
+import json
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.qr_codes import tasks
+from apps.qr_codes.models import QRScan, QRVisitor
+from tests.factories import QRCodeFactory
+
+
+class FakeRedis:
+    """The slice of the redis-py client the scan buffer uses, kept in memory."""
+
+    def __init__(self):
+        self.lists = {}
+
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues LRANGE/LTRIM calls and applies them on execute()."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def lrange(self, key, start, end):
+        self.calls.append(lambda: self.client.lists.get(key, [])[start:end + 1])
+
+    def ltrim(self, key, start, end):
+        def trim():
+            values = self.client.lists.get(key, [])
+            self.client.lists[key] = values[start:] if end == -1 else values[start:end + 1]
+            return True
+        self.calls.append(trim)
+
+    def execute(self):
+        return [call() for call in self.calls]
+
+
+def scan_entry(qr_code, **fields):
+    """A buffered scan for qr_code, as the redirect view enqueues it."""
+    entry = {
+        'qr_code_id': qr_code.id,
+        'ip_address': '203.0.113.7',
+        'user_agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X)',
+        'referer': '',
+        'visitor_id': 'visitor-a',
+        'scanned_at': timezone.now().isoformat(),
+    }
+    entry.update(fields)
+    return entry
+
+
+class RecordScansTests(TestCase):
+    """record_scans() writes scans, visitors and counters in one go."""
+
+    def setUp(self):
+        self.qr_code = QRCodeFactory()
+
+    def test_first_scan_by_a_visitor_is_unique(self):
+        written = tasks.record_scans([scan_entry(self.qr_code)])
+
+        self.assertEqual(written, 1)
+        scan = QRScan.objects.get()
+        self.assertTrue(scan.is_unique_visitor)
+        self.assertTrue(QRVisitor.objects.filter(
+            qr_code=self.qr_code, visitor_id='visitor-a'
+        ).exists())
+
+    def test_repeat_visitor_is_not_unique(self):
+        tasks.record_scans([scan_entry(self.qr_code)])
+        tasks.record_scans([scan_entry(self.qr_code)])
+
+        self.assertEqual(
+            list(QRScan.objects.order_by('id').values_list('is_unique_visitor', flat=True)),
+            [True, False]
+        )
+        self.assertEqual(QRVisitor.objects.count(), 1)
+
+    def test_repeat_visitor_within_one_batch_is_not_unique(self):
+        tasks.record_scans([
+            scan_entry(self.qr_code),
+            scan_entry(self.qr_code),
+            scan_entry(self.qr_code, visitor_id='visitor-b'),
+        ])
+
+        self.qr_code.refresh_from_db()
+        self.assertEqual(self.qr_code.total_scans, 3)
+        self.assertEqual(self.qr_code.unique_scans, 2)
+        self.assertIsNotNone(self.qr_code.last_scanned_at)
+
+    def test_scans_for_deleted_qr_codes_are_dropped(self):
+        entry = scan_entry(self.qr_code)
+        self.qr_code.delete()
+
+        self.assertEqual(tasks.record_scans([entry]), 0)
+        self.assertFalse(QRScan.objects.exists())
+
+    def test_request_values_are_cleaned(self):
+        tasks.record_scans([
+            scan_entry(self.qr_code, ip_address='not-an-ip', referer='x' * 5000),
+            scan_entry(self.qr_code, ip_address=' 10.0.0.1', visitor_id='visitor-b'),
+        ])
+
+        first, second = QRScan.objects.order_by('id')
+        self.assertIsNone(first.ip_address)
+        self.assertEqual(len(first.referer), tasks.SCAN_FIELD_MAX_LENGTHS['referer'])
+        self.assertEqual(second.ip_address, '10.0.0.1')
+
+
+class RecordScanTests(TestCase):
+    """record_scan() records one scan inline with as few queries as it can."""
+
+    def setUp(self):
+        self.qr_code = QRCodeFactory()
+
+    def scan_fields(self, **fields):
+        entry = scan_entry(self.qr_code, **fields)
+        del entry['qr_code_id']
+        return entry
+
+    def test_first_scan_by_a_visitor_is_unique(self):
+        tasks.record_scan(self.qr_code.id, self.scan_fields(ip_address='not-an-ip'))
+
+        scan = QRScan.objects.get()
+        self.assertTrue(scan.is_unique_visitor)
+        self.assertIsNone(scan.ip_address)
+        self.assertEqual(scan.device_type, 'mobile')
+        self.assertTrue(QRVisitor.objects.filter(
+            qr_code=self.qr_code, visitor_id='visitor-a'
+        ).exists())
+        self.qr_code.refresh_from_db()
+        self.assertEqual((self.qr_code.total_scans, self.qr_code.unique_scans), (1, 1))
+
+    def test_repeat_visitor_costs_three_queries(self):
+        tasks.record_scan(self.qr_code.id, self.scan_fields())
+
+        with self.assertNumQueries(3):
+            tasks.record_scan(self.qr_code.id, self.scan_fields())
+
+        self.assertFalse(QRScan.objects.order_by('-id')[0].is_unique_visitor)
+        self.qr_code.refresh_from_db()
+        self.assertEqual((self.qr_code.total_scans, self.qr_code.unique_scans), (2, 1))
+
+
+@override_settings(USE_CELERY=True, SCAN_BUFFER_ENABLED=False)
+class EnqueueScanTests(TestCase):
+    """enqueue_scan() hands scans to Celery without holding up the redirect."""
+
+    def setUp(self):
+        self.qr_code = QRCodeFactory()
+        self.fields = scan_entry(self.qr_code)
+        del self.fields['qr_code_id']
+
+    def test_publish_is_not_retried(self):
+        with mock.patch.object(tasks, 'record_scan_task') as task:
+            tasks.enqueue_scan(self.qr_code.id, self.fields)
+
+        task.apply_async.assert_called_once_with(
+            (self.qr_code.id, self.fields), retry=False
+        )
+        self.assertFalse(QRScan.objects.exists())
+
+    def test_scan_is_recorded_inline_when_the_broker_is_down(self):
+        with mock.patch.object(tasks, 'record_scan_task') as task:
+            task.apply_async.side_effect = ConnectionError
+            tasks.enqueue_scan(self.qr_code.id, self.fields)
+
+        self.assertEqual(QRScan.objects.filter(qr_code=self.qr_code).count(), 1)
+
+
+class FlushScanBufferTests(TestCase):
+    """flush_scan_buffer() drains the Redis list into the database."""
+
+    def setUp(self):
+        self.qr_code = QRCodeFactory()
+        self.client = FakeRedis()
+        patcher = mock.patch.object(tasks, '_buffer_client', self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def buffer(self, *entries):
+        self.client.rpush(tasks.SCAN_BUFFER_KEY, *(json.dumps(e) for e in entries))
+
+    def test_flush_writes_every_batch(self):
+        self.buffer(*(scan_entry(self.qr_code, visitor_id=f'v{i}') for i in range(5)))
+
+        self.assertEqual(tasks.flush_scan_buffer(batch_size=2), 5)
+        self.assertEqual(QRScan.objects.count(), 5)
+        self.assertEqual(self.client.lists[tasks.SCAN_BUFFER_KEY], [])
+
+    def test_bad_entry_is_dead_lettered_without_blocking_its_batch(self):
+        bad = {'ip_address': '203.0.113.7'}  # no qr_code_id
+        self.buffer(scan_entry(self.qr_code), bad, scan_entry(self.qr_code))
+
+        self.assertEqual(tasks.flush_scan_buffer(), 2)
+        self.assertEqual(QRScan.objects.count(), 2)
+        self.assertEqual(self.client.lists[tasks.SCAN_BUFFER_KEY], [])
+        self.assertEqual(
+            [json.loads(raw) for raw in self.client.lists[tasks.SCAN_BUFFER_DEAD_KEY]],
+            [bad]
+        )
+
+    def test_unwritten_entries_are_requeued_when_the_database_fails(self):
+        self.buffer(scan_entry(self.qr_code), scan_entry(self.qr_code))
+
+        with mock.patch.object(tasks, 'record_scans', side_effect=OperationalError):
+            with self.assertRaises(OperationalError):
+                tasks.flush_scan_buffer()
+
+        self.assertEqual(len(self.client.lists[tasks.SCAN_BUFFER_KEY]), 2)
+        self.assertNotIn(tasks.SCAN_BUFFER_DEAD_KEY, self.client.lists)
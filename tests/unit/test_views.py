@@ -0,0 +1,132 @@
+"""
+Tests for the QR code views.
+"""
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.qr_codes import tasks
+from apps.qr_codes.models import QRCode, QRScan
+from apps.qr_codes.views import BOT_REDIRECT_MAX_AGE, QR_CODES_PER_PAGE
+from tests.factories import QRCodeFactory, UserFactory
+
+BROWSER_USER_AGENT = 'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X)'
+
+
+class QRRedirectTests(TestCase):
+    """Only real scans of a short URL are recorded."""
+
+    def setUp(self):
+        self.qr_code = QRCodeFactory()
+        self.url = reverse('qr_codes:redirect', kwargs={'short_code': self.qr_code.short_code})
+
+    def test_browser_scan_is_recorded(self):
+        response = self.client.get(self.url, HTTP_USER_AGENT=BROWSER_USER_AGENT)
+
+        self.assertRedirects(response, self.qr_code.destination_url, fetch_redirect_response=False)
+        self.assertEqual(QRScan.objects.filter(qr_code=self.qr_code).count(), 1)
+        self.qr_code.refresh_from_db()
+        self.assertEqual(self.qr_code.total_scans, 1)
+
+    def test_link_previewer_is_redirected_without_a_scan(self):
+        response = self.client.get(self.url, HTTP_USER_AGENT='facebookexternalhit/1.1')
+
+        self.assertRedirects(response, self.qr_code.destination_url, fetch_redirect_response=False)
+        self.assertFalse(QRScan.objects.exists())
+        self.qr_code.refresh_from_db()
+        self.assertEqual(self.qr_code.total_scans, 0)
+
+    def test_head_request_is_redirected_without_a_scan(self):
+        response = self.client.head(self.url, HTTP_USER_AGENT=BROWSER_USER_AGENT)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(QRScan.objects.exists())
+
+    def test_bot_redirect_is_only_privately_cacheable(self):
+        response = self.client.head(self.url)
+
+        cache_control = response['Cache-Control']
+        self.assertIn('private', cache_control)
+        self.assertNotIn('public', cache_control)
+        self.assertIn(f'max-age={BOT_REDIRECT_MAX_AGE}', cache_control)
+
+
+@override_settings(USE_CELERY=True, SCAN_BUFFER_ENABLED=True)
+class QRRedirectScanLimitTests(TestCase):
+    """Scans of codes with max_scans count towards the limit straight away."""
+
+    def setUp(self):
+        buffer_client = mock.patch.object(tasks, '_buffer_client', mock.Mock())
+        scan_task = mock.patch.object(tasks, 'record_scan_task', mock.Mock())
+        self.buffer_client = buffer_client.start()
+        scan_task.start()
+        self.addCleanup(buffer_client.stop)
+        self.addCleanup(scan_task.stop)
+
+    def get(self, qr_code):
+        url = reverse('qr_codes:redirect', kwargs={'short_code': qr_code.short_code})
+        return self.client.get(url, HTTP_USER_AGENT=BROWSER_USER_AGENT)
+
+    def test_only_one_scan_fits_under_the_limit(self):
+        qr_code = QRCodeFactory(max_scans=3)
+        QRCode.increment_scan_counts(qr_code.pk, total=2)
+
+        first = self.get(qr_code)
+        second = self.get(qr_code)
+
+        self.assertEqual(first.status_code, 302)
+        self.assertContains(second, "Maximum scan limit reached")
+        self.assertEqual(QRScan.objects.filter(qr_code=qr_code).count(), 1)
+        self.buffer_client.rpush.assert_not_called()
+
+    def test_unlimited_codes_are_still_buffered(self):
+        qr_code = QRCodeFactory()
+
+        self.get(qr_code)
+
+        self.buffer_client.rpush.assert_called_once()
+        self.assertFalse(QRScan.objects.exists())
+
+
+class QRCodeListTests(TestCase):
+    """qr_code_list() shows one page of the user's QR codes at a time."""
+
+    def setUp(self):
+        self.user = UserFactory()
+        QRCodeFactory.create_batch(QR_CODES_PER_PAGE + 3, user=self.user)
+        self.client.force_login(self.user)
+        self.url = reverse('qr_codes:list')
+
+    def test_first_page_is_full(self):
+        response = self.client.get(self.url)
+
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj.object_list), QR_CODES_PER_PAGE)
+        self.assertEqual(page_obj.paginator.count, QR_CODES_PER_PAGE + 3)
+        self.assertTrue(page_obj.has_next())
+
+    def test_last_page_holds_the_remainder(self):
+        response = self.client.get(self.url, {'page': 2})
+
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj.object_list), 3)
+        self.assertFalse(page_obj.has_next())
+
+    def test_out_of_range_page_shows_the_last_page(self):
+        response = self.client.get(self.url, {'page': 99})
+
+        self.assertEqual(response.context['page_obj'].number, 2)
+
+    def test_filters_are_kept_in_pagination_links(self):
+        response = self.client.get(self.url, {'type': 'dynamic', 'page': 2})
+
+        self.assertEqual(response.context['filter_query'], 'type=dynamic')
+        self.assertContains(response, 'type=dynamic')
+
+    def test_other_users_qr_codes_are_not_listed(self):
+        self.client.force_login(UserFactory())
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context['page_obj'].paginator.count, 0)
@@ -6,14 +6,68 @@ Run on the server before deploying
 """
 
 import os
+import re
 import sys
 import socket
 import subprocess
 import json
 import secrets
-import string
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    import yaml
+except ImportError:  # PyYAML is needed for the docker-compose.yml checks
+    yaml = None
+
+try:
+    import docker
+except ImportError:  # Optional; the docker CLI is used instead
+    docker = None
+
+try:
+    import psutil
+except ImportError:  # Optional; /proc/net/tcp is read instead on Linux
+    psutil = None
+
+# Read-only queries the checks are built on
+DOCKER_PS_PORTS = ("docker", "ps", "--format", "{{.Names}}\t{{.Ports}}")
+DOCKER_NETWORK_LS = ("docker", "network", "ls", "--format", "{{.Name}}")
+DOCKER_VOLUME_LS = ("docker", "volume", "ls", "--format", "{{.Name}}")
+LSOF_LISTEN = ("lsof", "-iTCP", "-sTCP:LISTEN", "-n", "-P")
+SS_LISTEN = ("ss", "-H", "-ltnp")
+
+# Kernel socket tables, and the state column value for a listening socket
+PROC_NET_TCP = ("/proc/net/tcp", "/proc/net/tcp6")
+TCP_LISTEN_STATE = "0A"
+
+# Fields pulled out of those commands' output
+DOCKER_PORT_RE = re.compile(r'0\.0\.0\.0:(\d+)')
+SS_PROCESS_RE = re.compile(r'users:\(\("([^"]+)"')
+LSOF_PORT_RE = re.compile(r':(\d+)\s+\(LISTEN\)')
+
+# ss reads listening sockets over netlink; lsof (e.g. on macOS) has to walk
+# every process's open files
+LISTEN_PORTS = SS_LISTEN if shutil.which("ss") else LSOF_LISTEN
+
+# Likely compose service behind each well-known port
+PORT_SERVICES = {
+    '80': 'nginx',
+    '443': 'nginx',
+    '8080': 'web',
+    '8000': 'web',
+    '5432': 'db',
+    '6379': 'redis',
+}
+
+# Common alternates to suggest before counting up from a taken port
+ALTERNATE_PORTS = {
+    80: (8080, 8081, 8082, 8000, 8001),
+    5432: (5433, 5434, 5435),
+    6379: (6380, 6381, 6382),
+}
 
 
 class DeploymentValidator:
@@ -22,6 +76,13 @@ class DeploymentValidator:
         self.issues = []
         self.warnings = []
         self.fixes = []
+        self._outputs = {}  # Command output, keyed by argv tuple
+        self._used_ports = None  # Built once by _get_used_ports()
+        self._listening_ports = None  # Built once by _get_listening_ports()
+        self.docker_up = True  # Cleared by check_docker_running()
+        self._docker_client = None  # Set by _get_docker_client(); False if unavailable
+        self._env = self._load_env()  # None when .env is missing
+        self._compose = self._load_compose()
 
     def validate_all(self) -> bool:
         """Run all validation checks."""
@@ -29,10 +90,20 @@ class DeploymentValidator:
         print("=" * 50)
 
         self.check_docker_running()
+
+        # The queries behind the port, network and volume checks don't
+        # depend on each other, so run them at once rather than in turn.
+        # The SDK answers over one open connection and needs none of this
+        if self.docker_up and self._get_docker_client() is None:
+            self._prefetch(DOCKER_PS_PORTS, LISTEN_PORTS, DOCKER_NETWORK_LS, DOCKER_VOLUME_LS)
+
         self.check_env_file()
         self.check_port_availability()
-        self.check_network_conflicts()
-        self.check_volume_conflicts()
+        # Without the daemon there are no networks or volumes to compare
+        # against, so don't spend a docker call on each
+        if self.docker_up:
+            self.check_network_conflicts()
+            self.check_volume_conflicts()
         self.check_credentials()
 
         return self.show_results()
@@ -41,14 +112,18 @@ class DeploymentValidator:
         """Check if Docker is running."""
         print("\n📦 Checking Docker...")
         try:
-            subprocess.run(
-                ["docker", "ps"],
-                capture_output=True,
-                check=True,
-                timeout=5
-            )
+            # Connecting the SDK client negotiates the API version with the
+            # daemon, so a client is proof enough that it is up
+            if self._get_docker_client() is None:
+                subprocess.run(
+                    ["docker", "ps"],
+                    capture_output=True,
+                    check=True,
+                    timeout=5
+                )
             print("  ✅ Docker is running")
         except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+            self.docker_up = False
             self.issues.append({
                 'type': 'docker',
                 'message': 'Docker is not running or not installed',
@@ -61,10 +136,7 @@ class DeploymentValidator:
         """Check if .env file exists and has real values."""
         print("\n🔐 Checking .env file...")
 
-        env_path = self.project_dir / ".env"
-        env_example = self.project_dir / ".env.example"
-
-        if not env_path.exists():
+        if self._env is None:
             self.issues.append({
                 'type': 'env',
                 'message': '.env file missing',
@@ -77,7 +149,6 @@ class DeploymentValidator:
         print("  ✅ .env file exists")
 
         # Check for placeholder values
-        env_content = env_path.read_text()
         placeholders = [
             ('your-secret-key-here', 'SECRET_KEY'),
             ('secure-password-here', 'DB_PASSWORD'),
@@ -86,7 +157,7 @@ class DeploymentValidator:
         ]
 
         for placeholder, var_name in placeholders:
-            if placeholder in env_content:
+            if placeholder in self._env.get(var_name, ''):
                 self.warnings.append({
                     'type': 'env_placeholder',
                     'message': f'{var_name} still has placeholder value',
@@ -99,6 +170,12 @@ class DeploymentValidator:
         """Check if required ports are available."""
         print("\n🔌 Checking port availability...")
 
+        # Without a parsed compose file there are no ports to compare, and an
+        # empty list must not read as "all available"
+        if not self._compose:
+            print("  ⚠️  docker-compose.yml not loaded; port check skipped")
+            return
+
         # Parse docker-compose.yml to find required ports
         required_ports = self._get_required_ports()
 
@@ -141,19 +218,16 @@ class DeploymentValidator:
         """Check for Docker network name and subnet conflicts."""
         print("\n🌐 Checking network conflicts...")
 
+        if not self._compose:
+            print("  ⚠️  docker-compose.yml not loaded; network check skipped")
+            return
+
         # Get network name from docker-compose.yml
         project_networks = self._get_project_networks()
 
         # Get existing Docker networks
-        try:
-            result = subprocess.run(
-                ["docker", "network", "ls", "--format", "{{.Name}}"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            existing_networks = result.stdout.strip().split('\n')
-        except subprocess.CalledProcessError:
+        existing_networks = self._get_docker_networks()
+        if existing_networks is None:
             print("  ⚠️  Could not check Docker networks")
             return
 
@@ -194,17 +268,14 @@ class DeploymentValidator:
         """Check for Docker volume name conflicts."""
         print("\n💾 Checking volume conflicts...")
 
+        if not self._compose:
+            print("  ⚠️  docker-compose.yml not loaded; volume check skipped")
+            return
+
         project_volumes = self._get_project_volumes()
 
-        try:
-            result = subprocess.run(
-                ["docker", "volume", "ls", "--format", "{{.Name}}"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            existing_volumes = result.stdout.strip().split('\n')
-        except subprocess.CalledProcessError:
+        existing_volumes = self._get_docker_volumes()
+        if existing_volumes is None:
             print("  ⚠️  Could not check Docker volumes")
             return
 
@@ -228,17 +299,12 @@ class DeploymentValidator:
         """Check for secure credentials."""
         print("\n🔒 Checking credentials...")
 
-        env_path = self.project_dir / ".env"
-        if not env_path.exists():
+        if self._env is None:
             return
 
-        env_content = env_path.read_text()
-
         # Check SECRET_KEY length and randomness
-        import re
-        secret_match = re.search(r'SECRET_KEY=([^\n]+)', env_content)
-        if secret_match:
-            secret_key = secret_match.group(1)
+        secret_key = self._env.get('SECRET_KEY')
+        if secret_key:
             if len(secret_key) < 50:
                 secure_key = self._generate_secret_key()
                 self.warnings.append({
@@ -252,48 +318,46 @@ class DeploymentValidator:
                 print("  ✅ SECRET_KEY looks secure")
 
         # Check for ALLOWED_HOSTS
-        if 'ALLOWED_HOSTS=' in env_content:
-            hosts_match = re.search(r'ALLOWED_HOSTS=([^\n]+)', env_content)
-            if hosts_match and 'yourdomain.com' in hosts_match.group(1):
-                self.warnings.append({
-                    'type': 'allowed_hosts',
-                    'message': 'ALLOWED_HOSTS still has placeholder',
-                    'fix_location': 'SERVER',
-                    'fix': 'Update ALLOWED_HOSTS in .env with your actual domain'
-                })
-                print("  ⚠️  ALLOWED_HOSTS needs updating")
-
-    def _get_required_ports(self) -> List[str]:
-        """Parse docker-compose.yml for required ports."""
-        compose_file = self.project_dir / "docker-compose.yml"
-        if not compose_file.exists():
-            return []
-
-        ports = []
-        content = compose_file.read_text()
-
-        # Simple regex to find port mappings like "80:80" or "8000:8000"
-        import re
-        matches = re.findall(r'["\'"]?(\d+):\d+["\'"]?', content)
-        ports = list(set(matches))  # Remove duplicates
-
-        return ports
-
-    def _get_used_ports(self) -> Dict[str, str]:
-        """Get ports currently in use by Docker and system."""
-        used = {}
-
-        # Check Docker containers
-        try:
-            result = subprocess.run(
-                ["docker", "ps", "--format", "{{.Names}}\t{{.Ports}}"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+        if 'yourdomain.com' in self._env.get('ALLOWED_HOSTS', ''):
+            self.warnings.append({
+                'type': 'allowed_hosts',
+                'message': 'ALLOWED_HOSTS still has placeholder',
+                'fix_location': 'SERVER',
+                'fix': 'Update ALLOWED_HOSTS in .env with your actual domain'
+            })
+            print("  ⚠️  ALLOWED_HOSTS needs updating")
 
-            import re
-            for line in result.stdout.split('\n'):
+    def _get_docker_client(self):
+        """Return a Docker SDK client, connecting on first use, or None."""
+        if self._docker_client is None:
+            self._docker_client = False
+            if docker is not None:
+                try:
+                    self._docker_client = docker.from_env(timeout=5)
+                except docker.errors.DockerException:
+                    pass  # Daemon down, or no socket; the CLI reports why
+        return self._docker_client or None
+
+    def _get_container_ports(self) -> Dict[str, str]:
+        """Map host ports published by running containers to the container name."""
+        ports = {}
+
+        client = self._get_docker_client()
+        if client is not None:
+            try:
+                containers = client.api.containers()
+            except (docker.errors.DockerException, OSError):
+                return ports
+            for container in containers:
+                name = container['Names'][0].lstrip('/')
+                for binding in container.get('Ports') or []:
+                    if binding.get('IP') == '0.0.0.0' and 'PublicPort' in binding:
+                        ports[str(binding['PublicPort'])] = name
+            return ports
+
+        output = self._command_output(DOCKER_PS_PORTS)
+        if output is not None:
+            for line in output.split('\n'):
                 if not line.strip():
                     continue
                 parts = line.split('\t')
@@ -301,22 +365,155 @@ class DeploymentValidator:
                     container_name = parts[0]
                     ports_str = parts[1]
                     # Extract host ports like "0.0.0.0:80->80/tcp"
-                    ports = re.findall(r'0\.0\.0\.0:(\d+)', ports_str)
-                    for port in ports:
-                        used[port] = container_name
-        except subprocess.CalledProcessError:
-            pass
+                    for port in DOCKER_PORT_RE.findall(ports_str):
+                        ports[port] = container_name
+        return ports
 
-        # Check system ports using lsof (if available)
+    def _get_docker_networks(self) -> Optional[Set[str]]:
+        """Get the names of existing Docker networks, or None if unknown."""
+        client = self._get_docker_client()
+        if client is not None:
+            try:
+                return {network['Name'] for network in client.api.networks()}
+            except (docker.errors.DockerException, OSError):
+                return None
+
+        output = self._command_output(DOCKER_NETWORK_LS)
+        if output is None:
+            return None
+        # Docker names can't contain whitespace, and split() drops blank lines
+        return set(output.split())
+
+    def _get_docker_volumes(self) -> Optional[Set[str]]:
+        """Get the names of existing Docker volumes, or None if unknown."""
+        client = self._get_docker_client()
+        if client is not None:
+            try:
+                return {volume['Name'] for volume in client.api.volumes().get('Volumes') or []}
+            except (docker.errors.DockerException, OSError):
+                return None
+
+        output = self._command_output(DOCKER_VOLUME_LS)
+        if output is None:
+            return None
+        return set(output.split())
+
+    def _run_command(self, cmd: Tuple[str, ...]) -> Optional[str]:
+        """Run a read-only command and return its stdout, or None if it failed."""
         try:
             result = subprocess.run(
-                ["lsof", "-iTCP", "-sTCP:LISTEN", "-n", "-P"],
+                list(cmd),
                 capture_output=True,
-                text=True
+                text=True,
+                check=True,
+                timeout=5
             )
-            import re
-            for line in result.stdout.split('\n'):
-                match = re.search(r':(\d+)\s+\(LISTEN\)', line)
+        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+            return None
+        return result.stdout
+
+    def _prefetch(self, *cmds: Tuple[str, ...]):
+        """Run independent commands concurrently and keep their output."""
+        # Threads suffice: each one just waits on its subprocess
+        with ThreadPoolExecutor(max_workers=len(cmds)) as executor:
+            self._outputs.update(zip(cmds, executor.map(self._run_command, cmds)))
+
+    def _command_output(self, cmd: Tuple[str, ...]) -> Optional[str]:
+        """Return a command's output, running it only if not already run."""
+        if cmd not in self._outputs:
+            self._outputs[cmd] = self._run_command(cmd)
+        return self._outputs[cmd]
+
+    def _load_env(self) -> Optional[Dict[str, str]]:
+        """Read .env into a dict of raw values, or None if it doesn't exist."""
+        env_path = self.project_dir / ".env"
+        try:
+            lines = env_path.read_text().splitlines()
+        except FileNotFoundError:
+            return None
+
+        env = {}
+        for line in lines:
+            line = line.strip()
+            if '=' in line and not line.startswith('#'):
+                key, value = line.split('=', 1)
+                env[key.strip()] = value.strip()
+        return env
+
+    def _load_compose(self) -> Dict:
+        """Parse docker-compose.yml once; the port, network and volume checks share it."""
+        compose_file = self.project_dir / "docker-compose.yml"
+        if not compose_file.exists():
+            return {}
+
+        if yaml is None:
+            self.warnings.append({
+                'type': 'compose',
+                'message': 'PyYAML not installed; docker-compose.yml was not checked',
+                'fix_location': 'SERVER',
+                'fix': 'pip install pyyaml'
+            })
+            return {}
+
+        try:
+            return yaml.safe_load(compose_file.read_text()) or {}
+        except yaml.YAMLError as e:
+            self.issues.append({
+                'type': 'compose',
+                'message': f'docker-compose.yml is not valid YAML: {e}',
+                'fix_location': 'LOCAL',
+                'fix': 'Fix the syntax error in docker-compose.yml'
+            })
+            return {}
+
+    def _get_required_ports(self) -> List[str]:
+        """Get host ports published in docker-compose.yml."""
+        ports = set()
+
+        for service in (self._compose.get('services') or {}).values():
+            for mapping in (service or {}).get('ports') or []:
+                if isinstance(mapping, dict):
+                    # Long syntax: {target: 80, published: 8080}
+                    published = mapping.get('published')
+                else:
+                    # Short syntax: [HOST_IP:]HOST:CONTAINER[/PROTOCOL];
+                    # a bare CONTAINER port isn't published on the host
+                    parts = str(mapping).split('/')[0].rsplit(':', 2)
+                    published = parts[-2] if len(parts) >= 2 else None
+
+                # Ports set through ${VARIABLES} can't be checked here
+                if published is not None and str(published).isdigit():
+                    ports.add(str(published))
+
+        return sorted(ports)
+
+    def _get_used_ports(self) -> Dict[str, str]:
+        """Get ports currently in use by Docker and system."""
+        # Computed once per run; _find_available_port double-checks each
+        # candidate against the kernel's listening sockets anyway
+        if self._used_ports is not None:
+            return self._used_ports
+
+        used = {}
+
+        # Check Docker containers
+        if self.docker_up:
+            used.update(self._get_container_ports())
+
+        # Check system ports using ss or lsof (if available)
+        output = self._command_output(LISTEN_PORTS)
+        if output is not None and LISTEN_PORTS is SS_LISTEN:
+            for line in output.split('\n'):
+                # State Recv-Q Send-Q Local-Address:Port Peer-Address:Port Process
+                parts = line.split()
+                if len(parts) >= 4:
+                    port = parts[3].rsplit(':', 1)[-1]
+                    # Process names are only shown for sockets we may inspect
+                    process = SS_PROCESS_RE.search(line)
+                    used.setdefault(port, process.group(1) if process else 'unknown process')
+        elif output is not None:
+            for line in output.split('\n'):
+                match = LSOF_PORT_RE.search(line)
                 if match:
                     port = match.group(1)
                     if port not in used:
@@ -324,33 +521,62 @@ class DeploymentValidator:
                         parts = line.split()
                         if parts:
                             used[port] = parts[0]
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            pass
 
+        self._used_ports = used
         return used
 
     def _find_available_port(self, start_port: int) -> int:
         """Find next available port starting from start_port."""
         # Try common alternate ports first
-        if start_port == 80:
-            candidates = [8080, 8081, 8082, 8000, 8001]
-        elif start_port == 5432:
-            candidates = [5433, 5434, 5435]
-        elif start_port == 6379:
-            candidates = [6380, 6381, 6382]
-        else:
-            candidates = [start_port + i for i in range(1, 100)]
+        candidates = ALTERNATE_PORTS.get(start_port) or range(start_port + 1, start_port + 100)
 
         used_ports = self._get_used_ports()
+        listening = self._get_listening_ports()
 
         for port in candidates:
             if str(port) not in used_ports:
-                # Double-check by trying to bind
-                if self._is_port_available(port):
+                # Double-check against the kernel's listening sockets, or by
+                # trying to bind when they can't be listed
+                if listening is not None:
+                    if port not in listening:
+                        return port
+                elif self._is_port_available(port):
                     return port
 
         return start_port + 1000  # Fallback
 
+    def _get_listening_ports(self) -> Optional[Set[int]]:
+        """Get every local TCP port in the LISTEN state, or None if unknown."""
+        if self._listening_ports is not None:
+            return self._listening_ports
+
+        if psutil is not None:
+            try:
+                self._listening_ports = {
+                    conn.laddr.port for conn in psutil.net_connections(kind='tcp')
+                    if conn.status == psutil.CONN_LISTEN
+                }
+                return self._listening_ports
+            except (psutil.AccessDenied, OSError):
+                pass  # e.g. macOS without root
+
+        listening = set()
+        for table in PROC_NET_TCP:
+            try:
+                with open(table) as f:
+                    next(f, None)  # Header
+                    for line in f:
+                        # sl local_address rem_address st ...
+                        parts = line.split()
+                        if len(parts) > 3 and parts[3] == TCP_LISTEN_STATE:
+                            listening.add(int(parts[1].rsplit(':', 1)[1], 16))
+            except OSError:
+                if table == PROC_NET_TCP[0]:
+                    return None  # No /proc (not Linux)
+
+        self._listening_ports = listening
+        return listening
+
     def _is_port_available(self, port: int) -> bool:
         """Check if a port is available by trying to bind to it."""
         try:
@@ -362,47 +588,15 @@ class DeploymentValidator:
 
     def _port_to_service(self, port: str) -> Optional[str]:
         """Map port number to likely service name."""
-        mapping = {
-            '80': 'nginx',
-            '443': 'nginx',
-            '8080': 'web',
-            '8000': 'web',
-            '5432': 'db',
-            '6379': 'redis',
-        }
-        return mapping.get(port)
+        return PORT_SERVICES.get(port)
 
     def _get_project_networks(self) -> List[str]:
         """Get network names from docker-compose.yml."""
-        compose_file = self.project_dir / "docker-compose.yml"
-        if not compose_file.exists():
-            return []
-
-        networks = []
-        content = compose_file.read_text()
-
-        # Look for networks section
-        import re
-        # Match network names in networks: section
-        matches = re.findall(r'networks:\s*\n\s+(\w+):', content)
-        networks.extend(matches)
-
-        return networks
+        return list(self._compose.get('networks') or {})
 
     def _get_project_volumes(self) -> List[str]:
         """Get volume names from docker-compose.yml."""
-        compose_file = self.project_dir / "docker-compose.yml"
-        if not compose_file.exists():
-            return []
-
-        volumes = []
-        content = compose_file.read_text()
-
-        import re
-        matches = re.findall(r'volumes:\s*\n\s+(\w+):', content)
-        volumes.extend(matches)
-
-        return volumes
+        return list(self._compose.get('volumes') or {})
 
     def _check_subnet_conflicts(self) -> bool:
         """Check if Docker network subnets conflict."""
@@ -418,38 +612,58 @@ class DeploymentValidator:
         except subprocess.CalledProcessError:
             return False
 
+    def _get_used_subnets(self) -> Optional[Set[str]]:
+        """Get the subnets of existing Docker networks, or None if unknown."""
+        client = self._get_docker_client()
+        if client is not None:
+            # The network list already carries each network's IPAM config
+            try:
+                network_data = client.api.networks()
+            except (docker.errors.DockerException, OSError):
+                return None
+            return {
+                config['Subnet']
+                for network in network_data
+                for config in (network.get('IPAM') or {}).get('Config') or []
+                if 'Subnet' in config
+            }
+
+        output = self._command_output(DOCKER_NETWORK_LS)
+        if output is None:
+            return None
+        networks = output.split()
+        used_subnets = set()
+
+        # One inspect call for every network; it returns a JSON array
+        inspect_output = self._run_command(("docker", "network", "inspect", *networks))
+        if inspect_output is not None:
+            network_batches = [inspect_output]
+        else:
+            # A network removed since it was listed fails the whole
+            # call, so fall back to inspecting each one
+            network_batches = [
+                self._run_command(("docker", "network", "inspect", network))
+                for network in networks
+            ]
+
+        for batch in network_batches:
+            if batch is None:
+                continue
+            try:
+                for network_data in json.loads(batch):
+                    for config in (network_data.get('IPAM') or {}).get('Config') or []:
+                        if 'Subnet' in config:
+                            used_subnets.add(config['Subnet'])
+            except (json.JSONDecodeError, AttributeError):
+                continue
+
+        return used_subnets
+
     def _find_available_subnet(self) -> str:
         """Find an available Docker network subnet."""
         # Get all existing subnets
-        try:
-            result = subprocess.run(
-                ["docker", "network", "ls", "--format", "{{.Name}}"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-
-            networks = result.stdout.strip().split('\n')
-            used_subnets = set()
-
-            for network in networks:
-                if not network.strip():
-                    continue
-                try:
-                    inspect_result = subprocess.run(
-                        ["docker", "network", "inspect", network],
-                        capture_output=True,
-                        text=True,
-                        check=True
-                    )
-                    network_data = json.loads(inspect_result.stdout)
-                    if network_data and 'IPAM' in network_data[0]:
-                        for config in network_data[0]['IPAM'].get('Config', []):
-                            if 'Subnet' in config:
-                                used_subnets.add(config['Subnet'])
-                except (subprocess.CalledProcessError, json.JSONDecodeError, KeyError):
-                    continue
-
+        used_subnets = self._get_used_subnets()
+        if used_subnets is not None:
             # Find available subnet in 172.x.0.0/16 range
             for i in range(18, 32):
                 candidate = f"172.{i}.0.0/16"
@@ -462,15 +676,13 @@ class DeploymentValidator:
                 if candidate not in used_subnets:
                     return candidate
 
-        except subprocess.CalledProcessError:
-            pass
-
         return "172.25.0.0/16"  # Default fallback
 
     def _generate_secret_key(self, length: int = 50) -> str:
         """Generate a secure SECRET_KEY."""
-        alphabet = string.ascii_letters + string.digits + '!@#$%^&*(-_=+)'
-        return ''.join(secrets.choice(alphabet) for _ in range(length))
+        # One urandom call, and URL-safe characters only: a '$' in .env
+        # would be taken for a variable by docker compose
+        return secrets.token_urlsafe(length)[:length]
 
     def show_results(self) -> bool:
         """Show validation results and fixes."""
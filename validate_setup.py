@@ -5,257 +5,443 @@ Django Project Setup Validation Script
 Run this after project setup to verify everything is working correctly.
 """
 
+import io
+import json
 import os
 import sys
 import subprocess
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Set
+
+# Whether this interpreter runs inside a virtualenv (real_prefix is set by
+# the old virtualenv tool, base_prefix differs under venv); fixed per process
+IN_VIRTUALENV = hasattr(sys, 'real_prefix') or getattr(sys, 'base_prefix', sys.prefix) != sys.prefix
+
+# Prefixes for each outcome's messages
+PASS = "✅ "
+WARN = "⚠️  "
+FAIL = "❌ "
+
+# Paths the checks expect, relative to the project root; tuples rather than
+# sets so the report lists them in this order
+REQUIRED_DIRS = (
+    'apps/core',
+    'config/settings',
+    'static/css',
+    'templates',
+    'docs',
+    'requirements',
+)
+REQUIRED_DJANGO_FILES = (
+    'manage.py',
+    'config/__init__.py',
+    'config/settings/__init__.py',
+    'config/settings/base.py',
+    'config/settings/development.py',
+    'config/settings/production.py',
+    'config/urls.py',
+    'config/wsgi.py',
+)
+REQUIRED_DOCKER_FILES = (
+    'docker-compose.yml',
+    'Dockerfile',
+    'docker-entrypoint.sh',
+)
+OPTIONAL_DOCKER_FILES = (
+    'nginx/Dockerfile',
+    'nginx/nginx.conf',
+)
+
+# Where the docker CLI finds plugins such as compose
+COMPOSE_PLUGIN = 'docker-compose.exe' if os.name == 'nt' else 'docker-compose'
+DOCKER_CLI_PLUGIN_DIRS = [
+    Path(os.environ.get('DOCKER_CONFIG', Path.home() / '.docker')) / 'cli-plugins',
+    Path('/usr/local/lib/docker/cli-plugins'),
+    Path('/usr/local/libexec/docker/cli-plugins'),
+    Path('/usr/lib/docker/cli-plugins'),
+    Path('/usr/libexec/docker/cli-plugins'),
+]
+
+@dataclass(slots=True)
+class Results:
+    """Messages collected by the checks, by outcome."""
+    passed: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    
+    def extend(self, other: 'Results'):
+        """Append another set of results after these."""
+        self.passed.extend(other.passed)
+        self.warnings.extend(other.warnings)
+        self.errors.extend(other.errors)
 
 class SetupValidator:
     def __init__(self):
         self.project_dir = Path.cwd()
-        self.errors = []
-        self.warnings = []
-        self.passed = []
+        self._root = os.fspath(self.project_dir)  # For os.path.join in the lookups
+        # Resolved once; None means the tool isn't installed
+        self._docker = shutil.which('docker')
+        self._git = shutil.which('git')
+        self.results = Results()
+        self._dir_cache = {}  # Directory listings, keyed by project-relative path
+        self._file_cache = {}  # File contents, keyed by project-relative path
         
-    def run_validation(self) -> bool:
+    def run_validation(self, json_output: bool = False) -> bool:
         """Run all validation checks."""
-        print("🔍 Validating project setup...")
-        print("=" * 50)
-        
-        # Core file structure
-        self.check_project_structure()
-        self.check_django_files()
-        self.check_docker_files()
-        self.check_environment_files()
-        
-        # Dependencies and tools
-        self.check_python_environment()
-        self.check_docker_installation()
+        if not json_output:
+            print("🔍 Validating project setup...")
+            print("=" * 50)
         
-        # Configuration
-        self.check_django_settings()
-        self.check_database_config()
+        checks = [
+            # Core file structure
+            self.check_project_structure,
+            self.check_django_files,
+            self.check_docker_files,
+            self.check_environment_files,
+            
+            # Dependencies and tools
+            self.check_python_environment,
+            self.check_docker_installation,
+            
+            # Configuration
+            self.check_django_settings,
+            self.check_database_config,
+            
+            # Optional features
+            self.check_cloudflare_setup,
+            self.check_git_setup,
+        ]
         
-        # Optional features
-        self.check_cloudflare_setup()
-        self.check_git_setup()
+        # The checks are independent and mostly wait on the filesystem or
+        # on docker/git, so run them at once. Each returns its own Results;
+        # the only shared state is the listing and file caches, where racing
+        # checks at worst list or read the same path twice, which is harmless.
+        # map() hands the results back in the order above, so the report
+        # reads the same as a serial run
+        with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+            for results in executor.map(lambda check: check(), checks):
+                self.results.extend(results)
         
         # Show results
-        self.show_results()
+        if json_output:
+            self.show_json()
+        else:
+            self.show_results()
         
-        return len(self.errors) == 0
+        return not self.results.errors
+    
+    def _dir_entries(self, parent: str) -> Set[str]:
+        """List a project directory once; later lookups are set membership tests."""
+        if parent not in self._dir_cache:
+            try:
+                with os.scandir(os.path.join(self._root, parent)) as entries:
+                    self._dir_cache[parent] = {entry.name for entry in entries}
+            except (FileNotFoundError, NotADirectoryError):
+                # Missing parent: everything under it is missing too
+                self._dir_cache[parent] = set()
+        return self._dir_cache[parent]
+    
+    def _path_exists(self, rel_path: str) -> bool:
+        """Check a project-relative path against its parent's listing."""
+        parent, _, name = rel_path.rpartition('/')
+        return name in self._dir_entries(parent)
     
-    def check_project_structure(self):
+    def _read_bytes(self, rel_path: str) -> Optional[bytes]:
+        """Read a project file once, or return None if it doesn't exist."""
+        if rel_path not in self._file_cache:
+            try:
+                with open(os.path.join(self._root, rel_path), 'rb') as f:
+                    self._file_cache[rel_path] = f.read()
+            except (FileNotFoundError, NotADirectoryError):
+                self._file_cache[rel_path] = None
+        return self._file_cache[rel_path]
+    
+    def check_project_structure(self) -> Results:
         """Verify the expected directory structure exists."""
-        required_dirs = [
-            'apps/core',
-            'config/settings',
-            'static/css',
-            'templates',
-            'docs',
-            'requirements',
-        ]
+        results = Results()
         
-        for dir_path in required_dirs:
-            if (self.project_dir / dir_path).exists():
-                self.passed.append(f"✅ Directory structure: {dir_path}")
+        for dir_path in REQUIRED_DIRS:
+            if self._path_exists(dir_path):
+                results.passed.append(PASS + f"Directory structure: {dir_path}")
             else:
-                self.errors.append(f"❌ Missing directory: {dir_path}")
+                results.errors.append(FAIL + f"Missing directory: {dir_path}")
+        
+        return results
     
-    def check_django_files(self):
+    def check_django_files(self) -> Results:
         """Check for essential Django files."""
-        required_files = [
-            'manage.py',
-            'config/__init__.py',
-            'config/settings/__init__.py',
-            'config/settings/base.py',
-            'config/settings/development.py',
-            'config/settings/production.py',
-            'config/urls.py',
-            'config/wsgi.py',
-        ]
+        results = Results()
         
-        for file_path in required_files:
-            if (self.project_dir / file_path).exists():
-                self.passed.append(f"✅ Django file: {file_path}")
+        for file_path in REQUIRED_DJANGO_FILES:
+            if self._path_exists(file_path):
+                results.passed.append(PASS + f"Django file: {file_path}")
             else:
-                self.errors.append(f"❌ Missing Django file: {file_path}")
+                results.errors.append(FAIL + f"Missing Django file: {file_path}")
+        
+        return results
     
-    def check_docker_files(self):
+    def check_docker_files(self) -> Results:
         """Check Docker configuration files."""
-        docker_files = [
-            ('docker-compose.yml', True),
-            ('Dockerfile', True),
-            ('docker-entrypoint.sh', True),
-            ('nginx/Dockerfile', False),
-            ('nginx/nginx.conf', False),
-        ]
+        results = Results()
+        
+        for file_path in REQUIRED_DOCKER_FILES:
+            if self._path_exists(file_path):
+                results.passed.append(PASS + f"Docker file: {file_path}")
+            else:
+                results.errors.append(FAIL + f"Missing Docker file: {file_path}")
         
-        for file_path, required in docker_files:
-            if (self.project_dir / file_path).exists():
-                self.passed.append(f"✅ Docker file: {file_path}")
-            elif required:
-                self.errors.append(f"❌ Missing Docker file: {file_path}")
+        for file_path in OPTIONAL_DOCKER_FILES:
+            if self._path_exists(file_path):
+                results.passed.append(PASS + f"Docker file: {file_path}")
             else:
-                self.warnings.append(f"⚠️  Optional Docker file missing: {file_path}")
+                results.warnings.append(WARN + f"Optional Docker file missing: {file_path}")
+        
+        return results
     
-    def check_environment_files(self):
+    def check_environment_files(self) -> Results:
         """Check environment configuration files."""
-        if (self.project_dir / '.env.example').exists():
-            self.passed.append("✅ Environment template: .env.example")
+        results = Results()
+        
+        # Read rather than stat: the settings and database checks need the
+        # contents anyway, and skip themselves when this reports it missing
+        if self._read_bytes('.env.example') is not None:
+            results.passed.append(PASS + "Environment template: .env.example")
         else:
-            self.errors.append("❌ Missing .env.example file")
+            results.errors.append(FAIL + "Missing .env.example file")
         
-        if (self.project_dir / '.env').exists():
-            self.warnings.append("⚠️  .env file exists (good for development)")
+        if self._path_exists('.env'):
+            results.warnings.append(WARN + ".env file exists (good for development)")
         else:
-            self.warnings.append("⚠️  No .env file (you'll need to create one)")
+            results.warnings.append(WARN + "No .env file (you'll need to create one)")
         
-        if (self.project_dir / '.gitignore').exists():
-            self.passed.append("✅ Git ignore file exists")
+        if self._path_exists('.gitignore'):
+            results.passed.append(PASS + "Git ignore file exists")
         else:
-            self.errors.append("❌ Missing .gitignore file")
+            results.errors.append(FAIL + "Missing .gitignore file")
+        
+        return results
     
-    def check_python_environment(self):
+    def check_python_environment(self) -> Results:
         """Check Python and virtual environment setup."""
-        try:
-            python_version = subprocess.check_output([
-                sys.executable, '--version'
-            ], text=True).strip()
-            self.passed.append(f"✅ Python: {python_version}")
-        except subprocess.CalledProcessError:
-            self.errors.append("❌ Python version check failed")
+        results = Results()
+        
+        # This interpreter is the one being checked, so ask it directly
+        # rather than starting a copy of it to print its version
+        python_version = f"Python {sys.version.split()[0]}"
+        results.passed.append(PASS + f"Python: {python_version}")
         
         # Check if we're in a virtual environment
-        if hasattr(sys, 'real_prefix') or (hasattr(sys, 'base_prefix') and sys.base_prefix != sys.prefix):
-            self.passed.append("✅ Virtual environment: Active")
+        if IN_VIRTUALENV:
+            results.passed.append(PASS + "Virtual environment: Active")
         else:
-            self.warnings.append("⚠️  No virtual environment detected")
+            results.warnings.append(WARN + "No virtual environment detected")
+        
+        return results
     
-    def check_docker_installation(self):
+    def check_docker_installation(self) -> Results:
         """Check if Docker is installed and accessible."""
-        try:
-            docker_version = subprocess.check_output([
-                'docker', '--version'
-            ], text=True, stderr=subprocess.DEVNULL).strip()
-            self.passed.append(f"✅ {docker_version}")
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            self.warnings.append("⚠️  Docker not found (install for production deployment)")
-        
-        try:
-            compose_version = subprocess.check_output([
-                'docker', 'compose', 'version'
-            ], text=True, stderr=subprocess.DEVNULL).strip()
-            self.passed.append(f"✅ Docker Compose available")
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            self.warnings.append("⚠️  Docker Compose not found")
+        results = Results()
+        
+        if self._docker is None:
+            results.warnings.append(WARN + "Docker not found (install for production deployment)")
+            results.warnings.append(WARN + "Docker Compose not found")
+            return results
+        
+        # Start the probes before waiting on either, so they overlap
+        version_probe = subprocess.Popen(
+            [self._docker, '--version'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        
+        # The compose plugin is just a file in one of the CLI's plugin
+        # directories; only start the CLI when it isn't in a standard one
+        compose_found = any((plugin_dir / COMPOSE_PLUGIN).is_file() for plugin_dir in DOCKER_CLI_PLUGIN_DIRS)
+        compose_probe = None
+        if not compose_found:
+            compose_probe = subprocess.Popen(
+                [self._docker, 'compose', 'version'],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        
+        docker_version = version_probe.communicate()[0].strip()
+        if version_probe.returncode == 0:
+            results.passed.append(PASS + docker_version)
+        else:
+            results.warnings.append(WARN + "Docker not found (install for production deployment)")
+        
+        if compose_probe is not None:
+            compose_found = compose_probe.wait() == 0
+        if compose_found:
+            results.passed.append(PASS + "Docker Compose available")
+        else:
+            results.warnings.append(WARN + "Docker Compose not found")
+        
+        return results
     
-    def check_django_settings(self):
+    def check_django_settings(self) -> Results:
         """Validate Django settings files."""
-        settings_base = self.project_dir / 'config/settings/base.py'
-        if settings_base.exists():
-            content = settings_base.read_text()
-            if 'apps.core' in content:
-                self.passed.append("✅ Django settings: Core app configured")
+        results = Results()
+        
+        content = self._read_bytes('config/settings/base.py')
+        if content is not None:
+            if b'apps.core' in content:
+                results.passed.append(PASS + "Django settings: Core app configured")
             else:
-                self.warnings.append("⚠️  Core app not in INSTALLED_APPS")
+                results.warnings.append(WARN + "Core app not in INSTALLED_APPS")
         
         # Check if SECRET_KEY is properly configured
-        env_example = self.project_dir / '.env.example'
-        if env_example.exists():
-            content = env_example.read_text()
-            if 'SECRET_KEY' in content:
-                self.passed.append("✅ SECRET_KEY template configured")
+        content = self._read_bytes('.env.example')
+        if content is not None:
+            if b'SECRET_KEY' in content:
+                results.passed.append(PASS + "SECRET_KEY template configured")
             else:
-                self.errors.append("❌ SECRET_KEY not in .env.example")
+                results.errors.append(FAIL + "SECRET_KEY not in .env.example")
+        
+        return results
     
-    def check_database_config(self):
+    def check_database_config(self) -> Results:
         """Check database configuration."""
-        env_example = self.project_dir / '.env.example'
-        if env_example.exists():
-            content = env_example.read_text()
-            if 'DB_NAME' in content and 'DB_USER' in content:
-                self.passed.append("✅ Database configuration template")
+        results = Results()
+        
+        content = self._read_bytes('.env.example')
+        if content is not None:
+            if b'DB_NAME' in content and b'DB_USER' in content:
+                results.passed.append(PASS + "Database configuration template")
             else:
-                self.errors.append("❌ Database configuration incomplete")
+                results.errors.append(FAIL + "Database configuration incomplete")
+        
+        return results
     
-    def check_cloudflare_setup(self):
+    def check_cloudflare_setup(self) -> Results:
         """Check Cloudflare tunnel configuration if present."""
-        cloudflared_dir = self.project_dir / 'cloudflared'
-        if cloudflared_dir.exists():
-            if (cloudflared_dir / 'config.yml').exists():
-                self.passed.append("✅ Cloudflare: Configuration template")
+        results = Results()
+        
+        if self._path_exists('cloudflared'):
+            if self._path_exists('cloudflared/config.yml'):
+                results.passed.append(PASS + "Cloudflare: Configuration template")
             else:
-                self.warnings.append("⚠️  Cloudflare directory exists but config.yml missing")
+                results.warnings.append(WARN + "Cloudflare directory exists but config.yml missing")
             
-            if (cloudflared_dir / 'README.md').exists():
-                self.passed.append("✅ Cloudflare: Setup instructions")
+            if self._path_exists('cloudflared/README.md'):
+                results.passed.append(PASS + "Cloudflare: Setup instructions")
+        
+        return results
     
-    def check_git_setup(self):
+    def check_git_setup(self) -> Results:
         """Check Git repository initialization."""
-        if (self.project_dir / '.git').exists():
-            self.passed.append("✅ Git repository initialized")
+        results = Results()
+        
+        if self._path_exists('.git'):
+            results.passed.append(PASS + "Git repository initialized")
             
-            try:
-                # Check if there are any commits
-                subprocess.check_output([
-                    'git', 'rev-parse', 'HEAD'
-                ], stderr=subprocess.DEVNULL)
-                self.passed.append("✅ Git: Has commits")
-            except subprocess.CalledProcessError:
-                self.warnings.append("⚠️  Git initialized but no commits yet")
+            # Check if there are any commits; ask git only when the
+            # repository layout can't tell us
+            has_commits = self._has_commits()
+            if has_commits is None and self._git is not None:
+                has_commits = subprocess.run(
+                    [self._git, 'rev-parse', 'HEAD'],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                ).returncode == 0
+            
+            if has_commits is None:
+                results.warnings.append(WARN + "git not found; couldn't check for commits")
+            elif has_commits:
+                results.passed.append(PASS + "Git: Has commits")
+            else:
+                results.warnings.append(WARN + "Git initialized but no commits yet")
         else:
-            self.warnings.append("⚠️  Git repository not initialized")
+            results.warnings.append(WARN + "Git repository not initialized")
+        
+        return results
+    
+    def _has_commits(self) -> Optional[bool]:
+        """Tell from .git/HEAD whether HEAD points at a commit, or None if unsure."""
+        head = self._read_bytes('.git/HEAD')
+        if head is None:
+            return None  # .git is a file (worktree, submodule) or unreadable
+        
+        head = head.strip()
+        if not head.startswith(b'ref: '):
+            return True  # Detached HEAD holds a commit id
+        
+        ref = head[len(b'ref: '):].decode()
+        if ref == 'refs/heads/.invalid':
+            return None  # Reftable repository; refs aren't files
+        
+        # A branch exists once it has a commit, either as a loose ref file
+        # or as a line in packed-refs
+        if self._path_exists(f'.git/{ref}'):
+            return True
+        packed_refs = self._read_bytes('.git/packed-refs') or b''
+        return any(line.endswith(b' ' + ref.encode()) for line in packed_refs.splitlines())
     
     def show_results(self):
         """Display validation results."""
-        print("\n" + "=" * 50)
-        print("📊 Validation Results")
-        print("=" * 50)
-        
-        if self.passed:
-            print(f"\n✅ PASSED ({len(self.passed)} checks)")
-            for item in self.passed:
-                print(f"  {item}")
-        
-        if self.warnings:
-            print(f"\n⚠️  WARNINGS ({len(self.warnings)} items)")
-            for item in self.warnings:
-                print(f"  {item}")
-        
-        if self.errors:
-            print(f"\n❌ ERRORS ({len(self.errors)} items)")
-            for item in self.errors:
-                print(f"  {item}")
-        
-        print("\n" + "=" * 50)
-        
-        if self.errors:
-            print("❌ Setup validation FAILED")
-            print("Please fix the errors above before proceeding.")
-            return False
-        elif self.warnings:
-            print("⚠️  Setup validation passed with warnings")
-            print("Consider addressing the warnings for optimal setup.")
+        # Build the report in memory and write it once, rather than a
+        # print() (and, on a terminal, a write) per line
+        out = io.StringIO()
+        results = self.results
+        
+        print("\n" + "=" * 50, file=out)
+        print("📊 Validation Results", file=out)
+        print("=" * 50, file=out)
+        
+        if results.passed:
+            print(f"\n{PASS}PASSED ({len(results.passed)} checks)", file=out)
+            print("\n".join(f"  {item}" for item in results.passed), file=out)
+        
+        if results.warnings:
+            print(f"\n{WARN}WARNINGS ({len(results.warnings)} items)", file=out)
+            print("\n".join(f"  {item}" for item in results.warnings), file=out)
+        
+        if results.errors:
+            print(f"\n{FAIL}ERRORS ({len(results.errors)} items)", file=out)
+            print("\n".join(f"  {item}" for item in results.errors), file=out)
+        
+        print("\n" + "=" * 50, file=out)
+        
+        if results.errors:
+            print(FAIL + "Setup validation FAILED", file=out)
+            print("Please fix the errors above before proceeding.", file=out)
+        elif results.warnings:
+            print(WARN + "Setup validation passed with warnings", file=out)
+            print("Consider addressing the warnings for optimal setup.", file=out)
         else:
-            print("✅ Setup validation PASSED")
-            print("Your project is ready for development!")
+            print(PASS + "Setup validation PASSED", file=out)
+            print("Your project is ready for development!", file=out)
         
-        print("\n🚀 Next steps:")
-        if not self.errors:
-            print("  1. Create .env file from .env.example")
-            print("  2. Run: python manage.py migrate")
-            print("  3. Run: python manage.py runserver")
-            print("  4. Visit: http://localhost:8000")
+        if not results.errors:
+            print("\n🚀 Next steps:", file=out)
+            print("  1. Create .env file from .env.example", file=out)
+            print("  2. Run: python manage.py migrate", file=out)
+            print("  3. Run: python manage.py runserver", file=out)
+            print("  4. Visit: http://localhost:8000", file=out)
         
-        return True
+        sys.stdout.write(out.getvalue())
+
+    def show_json(self):
+        """Print the results as a single JSON object, for CI."""
+        results = self.results
+        print(json.dumps({
+            'passed': len(results.passed),
+            'warnings': [item.removeprefix(WARN) for item in results.warnings],
+            'errors': [item.removeprefix(FAIL) for item in results.errors],
+        }))
 
 def main():
     """Main validation function."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Validate project setup')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable JSON instead of the report')
+    
+    args = parser.parse_args()
+    
     validator = SetupValidator()
-    success = validator.run_validation()
+    success = validator.run_validation(json_output=args.json)
     sys.exit(0 if success else 1)
 
 if __name__ == '__main__':